@@ -0,0 +1,199 @@
+from engine_defines import *
+from ai_search import GameSearch, SearchStats, SEARCH_MODE_ALPHA_BETA, shutdownProcessPool
+from bitboard import findMovePath
+from transposition import getPersistentTable
+from time import perf_counter
+import multiprocessing
+import queue
+import atexit
+
+
+#AI searches running in a separate process. A thread in the game process shares the GIL with drawing, so animations stutter while the AI computes,
+#a process doesn't. The process is started when the first move is searched and is reused for all following ones, searches are queued and run one by one.
+
+#Jobs are cancelled through shared flags, one per job id modulo this count. There are never this many jobs waiting at once, so a flag is only reused after its' job finished.
+AI_PROCESS_CANCEL_SLOTS = 1024
+
+
+#Search in the AI process, publishes its' progress into shared memory instead of keeping it in an attribute and is cancelled through a shared flag
+class SharedProgressSearch(GameSearch):
+    #shared double, is written without a lock - the game only reads it to draw the progress bar
+    progress_value = None
+    #shared cancel flags of all jobs and index of the flag of this search's job
+    cancel_flags = None
+    cancel_slot = 0
+    def __init__(self, progress_value, cancel_flags, cancel_slot, search_mode, stats_log = None, transposition_table = None):
+        self.progress_value = progress_value
+        self.cancel_flags = cancel_flags
+        self.cancel_slot = cancel_slot
+        super().__init__(search_mode, transposition_table, stats_log)
+
+    #the flag is read without a lock, it is read for every searched position
+    def isCancelled(self):
+        return self.cancelled or self.cancel_flags[self.cancel_slot] != 0
+
+    @property
+    def compute_progress(self):
+        return self.progress_value.value
+
+    @compute_progress.setter
+    def compute_progress(self, value):
+        self.progress_value.value = value
+
+
+#Runs in the AI process - search jobs one by one until None is received. Results are (job id, encoded move or None if cancelled, search statistics).
+#Jobs cancelled while they were queued are skipped. Progress of the running job is published together with its' id.
+#Transposition tables are kept in this process by the table key of the job, see getPersistentTable.
+def runSearchProcess(jobs, results, progress_value, progress_job, cancel_flags):
+    while True:
+        job = jobs.get()
+        if job is None: break
+        job_id, color, game_state, depth, search_mode, time_budget, stats_log, table_key = job
+        cancel_slot = job_id % AI_PROCESS_CANCEL_SLOTS
+        if cancel_flags[cancel_slot]: continue
+        #the progress is reset before the id changes, so that the new job never shows progress of the previous one
+        progress_value.value = 0.0
+        progress_job.value = job_id
+        table = getPersistentTable(table_key) if table_key is not None else None
+        search = SharedProgressSearch(progress_value, cancel_flags, cancel_slot, search_mode, stats_log, table)
+        move = search.findBestMove(color, game_state, depth, time_budget)
+        progress_job.value = -1
+        results.put((job_id, move, search.getStats()))
+    #parallel searches started worker processes of their own
+    shutdownProcessPool()
+
+
+#The AI process and queues for communicating with it. There is one for the whole program, see getAIProcess.
+class AIProcess:
+    def __init__(self):
+        self.jobs = multiprocessing.Queue()
+        self.results = multiprocessing.Queue()
+        #progress of the running search, 0 - 1, and id of the job it belongs to - -1 when no job is running
+        self.progress_value = multiprocessing.RawValue("d", 0.0)
+        self.progress_job = multiprocessing.RawValue("i", -1)
+        #set by cancel(), see AI_PROCESS_CANCEL_SLOTS
+        self.cancel_flags = multiprocessing.RawArray("b", AI_PROCESS_CANCEL_SLOTS)
+        self.next_job_id = 0
+        #results received for jobs that are still waited for, by job id. Results of other jobs are thrown away.
+        self.waiting = set()
+        self.finished = {}
+        self.process = multiprocessing.Process(target=runSearchProcess, args=(self.jobs, self.results, self.progress_value, self.progress_job, self.cancel_flags), daemon=False)
+        self.process.start()
+
+    #queue a search, return its' job id. Searches with the same table key share the transposition table, None for a new table.
+    def submit(self, color, game_state, depth, search_mode, time_budget, stats_log, table_key = None):
+        job_id = self.next_job_id
+        self.next_job_id += 1
+        self.waiting.add(job_id)
+        self.cancel_flags[job_id % AI_PROCESS_CANCEL_SLOTS] = 0
+        self.jobs.put((job_id, color, game_state, depth, search_mode, time_budget, stats_log, table_key))
+        return job_id
+
+    #return (encoded move, search statistics) for a job, None if it isn't finished yet. Doesn't block.
+    def getResult(self, job_id):
+        while True:
+            try:
+                result_id, move, stats = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if result_id in self.waiting:
+                self.finished[result_id] = (move, stats)
+        if job_id in self.finished:
+            self.waiting.discard(job_id)
+            return self.finished.pop(job_id)
+        return None
+
+    #stop the job if it is running, or skip it if it is still queued. Other jobs aren't affected. Its' result is never returned.
+    def cancel(self, job_id):
+        self.waiting.discard(job_id)
+        self.finished.pop(job_id, None)
+        self.cancel_flags[job_id % AI_PROCESS_CANCEL_SLOTS] = 1
+
+    #whether the job is being searched right now, not queued or finished
+    def isRunning(self, job_id):
+        return self.progress_job.value == job_id
+
+    #progress of a job, 0 - 1. Jobs that are queued or finished already have 0.
+    def getProgress(self, job_id):
+        progress = self.progress_value.value
+        return progress if self.isRunning(job_id) else 0.0
+
+    #stop the process after the running job, jobs that are still waited for are cancelled
+    def shutdown(self):
+        for job_id in list(self.waiting):
+            self.cancel(job_id)
+        self.jobs.put(None)
+        self.process.join()
+
+
+#the AI process, started when first needed
+ai_process = None
+def getAIProcess():
+    global ai_process
+    if ai_process is None:
+        ai_process = AIProcess()
+        atexit.register(ai_process.shutdown)
+    return ai_process
+
+
+#Searches one move in the AI process. Has the same interface as AIPlayerThread in player.py, can be used instead of it.
+class AIPlayerProcess:
+    #job id in the AI process, None once cancelled
+    job_id = None
+    def __init__(self, color, game_state, depth, search_mode = SEARCH_MODE_ALPHA_BETA, time_budget = None, stats_log = None, table_key = None):
+        #the process returns an encoded move, it is converted to move tree nodes here
+        must_jump, self.possible_moves = game_state.findPossibleMovesForPlayerOfColor(color)
+        self.time_budget = time_budget
+        #when the job was first seen running, None while it is queued
+        self.start_time = None
+        self.result = None
+        self.stats = SearchStats()
+        self.done = False
+        self.process = getAIProcess()
+        self.job_id = self.process.submit(color, game_state, depth, search_mode, time_budget, stats_log, table_key)
+
+    def update(self):
+        if self.done or self.job_id is None: return
+        result = self.process.getResult(self.job_id)
+        if result is None: return
+        move, self.stats = result
+        self.result = findMovePath(self.possible_moves, move) if move is not None else None
+        self.done = True
+
+    #stop the computation, the result stays None
+    def cancel(self):
+        if self.job_id is not None and not self.done:
+            self.process.cancel(self.job_id)
+        self.job_id = None
+
+    #get computed result, or none if there isn't one yet
+    def getResult(self):
+        self.update()
+        return self.result
+
+    #whether the search is still running
+    def isAlive(self):
+        self.update()
+        return not self.done and self.job_id is not None
+
+    #how large a part was done already, in percent. When searching with a time budget, this is the part of the budget used. 0 while the job is queued.
+    def getProgress(self):
+        self.update()
+        if self.done: return 1.0
+        if self.job_id is None: return 0.0
+        if self.time_budget is not None:
+            if self.start_time is None:
+                if not self.process.isRunning(self.job_id): return 0.0
+                self.start_time = perf_counter()
+            return min(1.0, (perf_counter() - self.start_time) / self.time_budget)
+        return self.process.getProgress(self.job_id)
+
+    #statistics of the search, see SearchStats. Empty until the search finished.
+    def getStats(self):
+        self.update()
+        return self.stats
+
+
+#if this file was ran instead of main.py, run main instead
+if __name__ == "__main__":
+    import main
@@ -0,0 +1,564 @@
+from engine_defines import *
+from random import randint
+from time import perf_counter
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import multiprocessing
+import os
+import json
+import sys
+from bitboard import MOVE_PASS, moveFrom, moveTo, moveCaptured, countBits, bitSquare, findMovePath
+from transposition import TranspositionTable, BOUND_EXACT, BOUND_LOWER, BOUND_UPPER
+
+
+#Enum of search algorithms
+#Minimax - every move is searched to the full depth, slow but simple
+SEARCH_MODE_MINIMAX = 0
+#Alpha-beta - negamax with alpha-beta pruning and move ordering, finds the same best moves while skipping branches that cannot change the result
+SEARCH_MODE_ALPHA_BETA = 1
+#Parallel alpha-beta - moves (or pairs of a move and a reply, when there are fewer moves than processes) are searched by a pool of processes
+SEARCH_MODE_PARALLEL = 2
+
+#deepest search done when searching with a time budget
+MAX_SEARCH_DEPTH = 64
+
+#how often the parallel search checks whether it was cancelled while waiting for worker processes, in seconds
+PARALLEL_CANCEL_CHECK_INTERVAL = 0.05
+
+#weights closer than this are considered equal
+WEIGHT_EPSILON = 1e-10
+
+#check whether two weights are equal. Infinite weights have to be compared directly, as inf - inf isn't a number.
+def weightsEqual(w1, w2):
+    return w1 == w2 or abs(w1 - w2) < WEIGHT_EPSILON
+
+
+#All moves of a player as a flat list of encoded moves (see bitboard.py). A player without any moves passes, so the list is never empty.
+def listAllMoves(game_state, player_color):
+    must_jump, moves = game_state.findPossibleMovesFlat(player_color)
+    return moves or [MOVE_PASS]
+
+
+#assess how good the position is for the white player - ratio of white to black pieces, queen is equal to three normal pieces
+def evaluateGameState(game_state):
+    #count pieces
+    w, b = game_state.countPieces()
+    #value on each side
+    val_w = w[0] + 3*w[1]; val_b = b[0] + 3*b[1]
+    return float("inf") if val_b == 0 else val_w / val_b
+
+#weights are done from the viewpoint of white, negamax needs them from the viewpoint of the player to move
+def colorSign(player_color):
+    return 1 if player_color == COLOR_WHITE else -1
+
+
+#Statistics of one search - how many positions were searched and where the time was spent. Times are in seconds.
+class SearchStats:
+    def __init__(self):
+        #positions reached by playing a move, and positions that were evaluated instead of being searched deeper
+        self.nodes = 0
+        self.leaves = 0
+        #positions whose moves were generated, and how many moves were generated in total
+        self.expanded = 0
+        self.moves_generated = 0
+        #depth of the last completed iteration
+        self.depth_reached = 0
+        #transposition table lookups done by this search and how many of them found the position
+        self.table_probes = 0
+        self.table_hits = 0
+        #time of the whole search, and time spent generating moves, ordering them, evaluating positions, applying and undoing moves and copying game states
+        self.time_total = 0.0
+        self.time_movegen = 0.0
+        self.time_ordering = 0.0
+        self.time_eval = 0.0
+        self.time_make_unmake = 0.0
+        self.time_copy = 0.0
+
+    #average amount of moves in a searched position
+    def getBranchingFactor(self):
+        return self.moves_generated / self.expanded if self.expanded else 0.0
+
+    #part of transposition table lookups that found the position
+    def getTableHitRate(self):
+        return self.table_hits / self.table_probes if self.table_probes else 0.0
+
+    #add statistics of another search, e.g. of a part of the search done by a worker process. Depth and total time are kept.
+    def add(self, other):
+        for name in ("nodes", "leaves", "expanded", "moves_generated", "table_probes", "table_hits", "time_movegen", "time_ordering", "time_eval", "time_make_unmake", "time_copy"):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+
+    def toDict(self):
+        d = dict(vars(self))
+        d["branching_factor"] = self.getBranchingFactor()
+        d["table_hit_rate"] = self.getTableHitRate()
+        d["nodes_per_second"] = self.nodes / self.time_total if self.time_total else 0.0
+        return d
+
+
+#Raised inside of the search when the time budget runs out, the unfinished iteration is thrown away
+class SearchTimeout(Exception):
+    pass
+
+#Raised inside of the search when it was cancelled, the whole search is thrown away
+class SearchCancelled(Exception):
+    pass
+
+
+#Searches for the best move for a player. Holds the transposition table and progress of the current search.
+class GameSearch:
+    #how large a part of the computation was finished already, in percent
+    compute_progress = 0.0
+    #statistics of the last search
+    stats = None
+    #file to append statistics of every search to, as one json object per line. None to not log them.
+    stats_log = None
+    #set by cancel(), possibly from another thread - the search stops as soon as it notices
+    cancelled = False
+    def __init__(self, search_mode = SEARCH_MODE_ALPHA_BETA, transposition_table = None, stats_log = None):
+        self.search_mode = search_mode
+        self.stats = SearchStats()
+        self.stats_log = stats_log
+        #positions searched already, shared by the whole search
+        self.transposition_table = transposition_table if transposition_table is not None else TranspositionTable()
+        self.compute_progress = 0.0
+        #time budget of the current search in seconds, None when searching to a fixed depth
+        self.time_budget = None
+        self.start_time = 0.0
+        #when to stop searching, None if there is no deadline right now
+        self.deadline = None
+        #depth of the last completed iteration
+        self.depth_reached = 0
+        #transposition table counters at the start of the current search
+        self.table_counts_start = (0, 0)
+        self.cancelled = False
+        #in worker processes - (shared search generation, generation of the current task). The task was cancelled if they differ.
+        self.worker_generation = None
+        #whether tasks of this search are running in worker processes - cancel() only stops worker tasks while they are
+        self.workers_running = False
+
+    #find weights of all moves for given player, from the viewpoint of white, using the selected search mode
+    def findRootWeights(self, color, game_state, depth):
+        if self.search_mode == SEARCH_MODE_MINIMAX:
+            return self.findMoveWeights(color, game_state, depth)
+        if self.search_mode == SEARCH_MODE_PARALLEL:
+            return self.findMoveWeightsParallel(color, game_state, depth)
+        return self.findMoveWeightsAlphaBeta(color, game_state, depth)
+
+    #find the best move for given player, as a list of move tree nodes. Returns None if the search was cancelled.
+    def findOptimalMove(self, color, game_state, depth, time_budget = None):
+        #find possible moves for current game
+        must_jump, possible_moves = game_state.findPossibleMovesForPlayerOfColor(color)
+        move = self.findBestMove(color, game_state, depth, time_budget)
+        if move is None: return None
+        #the search works with encoded moves, the game needs move tree nodes to show and animate the move
+        return findMovePath(possible_moves, move)
+
+    #find the best move for given player, as an encoded move. Without time budget, the search is done to the given depth.
+    #With a time budget in seconds, the search is deepened one move at a time until the budget runs out, depth is then the max depth to search to.
+    #Returns None if the search was cancelled.
+    def findBestMove(self, color, game_state, depth, time_budget = None):
+        all_moves = listAllMoves(game_state, color)
+        self.start_time = perf_counter()
+        self.time_budget = time_budget
+        self.depth_reached = 0
+        self.startStats()
+        try:
+            self.transposition_table.newSearch()
+            #the table can be kept from previous searches - positions with pieces that were captured since are never reached again
+            self.transposition_table.evictUnreachable(game_state.countAllPieces())
+            #find how good each of previously found moves is
+            if time_budget is None:
+                weights = self.findRootWeights(color, game_state, depth)
+                self.depth_reached = depth
+            else:
+                weights = self.findRootWeightsIterative(color, game_state, depth, time_budget)
+            move = self.selectMove(color, all_moves, weights)
+            self.finishStats()
+            return move
+        except SearchCancelled:
+            return None
+        #If AI crashes for any reason, return first possible move, better than having the game freeze. Statistics are still logged, with the depth actually reached.
+        except:
+            self.finishStats()
+            return all_moves[0]
+
+    #iterative deepening - search to depth 0, 1, 2, ... until the time runs out, return weights from the last completed iteration.
+    #Each iteration is cheap compared to the next one, and it fills the transposition table with best moves that the next iteration searches first.
+    def findRootWeightsIterative(self, color, game_state, max_depth, time_budget):
+        weights = None
+        #the first iteration always finishes, so that there is a move to play
+        self.deadline = None
+        for depth in range(max_depth + 1):
+            try:
+                #a timeout leaves moves applied on the searched state, search a copy so that it can be thrown away
+                weights = self.findRootWeights(color, self.copyState(game_state), depth)
+            except SearchTimeout:
+                break
+            self.depth_reached = depth
+            self.deadline = self.start_time + time_budget
+            #no need to search deeper if there is only one move or the best move wins already. Weights are from the viewpoint of white - inf is a win for white, 0 for black.
+            best = max(weights) if color == COLOR_WHITE else min(weights)
+            if len(weights) == 1 or best == (float("inf") if color == COLOR_WHITE else 0): break
+        self.deadline = None
+        return weights
+
+    #reset statistics before a search
+    def startStats(self):
+        self.stats = SearchStats()
+        #the table counts lookups of all searches using it, only the difference is for this search
+        self.table_counts_start = (self.transposition_table.probes, self.transposition_table.hits)
+
+    #fill in statistics known at the end of a search and log them
+    def finishStats(self):
+        self.stats.depth_reached = self.depth_reached
+        self.stats.time_total = perf_counter() - self.start_time
+        self.stats.table_probes += self.transposition_table.probes - self.table_counts_start[0]
+        self.stats.table_hits += self.transposition_table.hits - self.table_counts_start[1]
+        if self.stats_log is not None:
+            try:
+                with open(self.stats_log, "a") as f:
+                    f.write(json.dumps(dict(self.stats.toDict(), search_mode=self.search_mode, time_budget=self.time_budget)) + "\n")
+            except OSError as e:
+                print("Search statistics couldn't be logged:", e)
+
+    #statistics of the last finished search, or of the one running right now
+    def getStats(self):
+        return self.stats
+
+    #the search does everything through the functions below, so that statistics can be collected
+
+    #list all moves of a player, see listAllMoves
+    def generateMoves(self, game_state, player_color):
+        start = perf_counter()
+        all_moves = listAllMoves(game_state, player_color)
+        self.stats.time_movegen += perf_counter() - start
+        self.stats.expanded += 1
+        self.stats.moves_generated += len(all_moves)
+        return all_moves
+
+    #assess position, see evaluateGameState
+    def evaluate(self, game_state):
+        start = perf_counter()
+        value = evaluateGameState(game_state)
+        self.stats.time_eval += perf_counter() - start
+        self.stats.leaves += 1
+        return value
+
+    #apply move on the game state, return undo token
+    def makeMove(self, game_state, move):
+        start = perf_counter()
+        undo_token = game_state.applyMove(move)
+        self.stats.time_make_unmake += perf_counter() - start
+        self.stats.nodes += 1
+        return undo_token
+
+    def unmakeMove(self, game_state, undo_token):
+        start = perf_counter()
+        game_state.undo(undo_token)
+        self.stats.time_make_unmake += perf_counter() - start
+
+    def copyState(self, game_state):
+        start = perf_counter()
+        copy = game_state.copy()
+        self.stats.time_copy += perf_counter() - start
+        return copy
+
+    #stop the search, can be called from any thread. findOptimalMove then returns None, worker processes stop their tasks too.
+    #The generation is shared by all searches, tasks of other parallel searches are stopped as well - they submit them again, see findMoveWeightsParallel.
+    def cancel(self):
+        self.cancelled = True
+        if self.workers_running and process_generation is not None:
+            with process_generation.get_lock():
+                process_generation.value += 1
+
+    #whether cancel() was called, or the task of a worker process was cancelled
+    def isCancelled(self):
+        return self.cancelled or (self.worker_generation is not None and self.worker_generation[0].value != self.worker_generation[1])
+
+    #raise SearchCancelled if the search was cancelled, SearchTimeout if the deadline has passed. Is called for every searched position.
+    def checkDeadline(self):
+        if self.isCancelled():
+            raise SearchCancelled()
+        if self.deadline is not None and perf_counter() > self.deadline:
+            raise SearchTimeout()
+
+    #how large a part of the search was done already - part of the time budget when searching with one, part of the moves searched otherwise
+    def getProgress(self):
+        if self.time_budget is not None:
+            return min(1.0, (perf_counter() - self.start_time) / self.time_budget)
+        return self.compute_progress
+
+    #select one of the moves with the best weight, all_moves are encoded moves in the same order as weights
+    def selectMove(self, color, all_moves, weights):
+        #weights are done from the viewpoint of white -> larger numbers are good for him. Select min/max number based on player color
+        target = max(weights) if color == COLOR_WHITE else min(weights)
+
+        #how many weights are there with the same value as target, then select a random move. This is done to prevent AI from looping the same move over and over again.
+        count = sum([1 if weightsEqual(target, w) else 0 for w in weights])
+        #index of the move to select
+        a = randint(0, count - 1)
+
+        a_i = 0
+        #go through all possible moves, select the one with the correct index
+        for move, weight in zip(all_moves, weights):
+            if weightsEqual(weight, target):
+                if a_i == a:
+                    return move
+                a_i += 1
+        print("Move with correct index not found.")
+        #return first available move
+        return all_moves[0]
+
+
+    def findMoveWeights(self, player_color, game_state, depth, progress = 0.0, importance_mult = 1.0, all_moves = None):
+        #progress bar explanation - progress marks the part of bar done already, importance mult is the change, which will occur after this instance of the function finishes running
+        #Since this function can be split into multiple parts(total mark_c), one for each move, progress bar can be updated once per each part completion
+
+        #how good is each individual move for the white player
+        move_weights = []
+        #find all possible moves, if they weren't found already
+        if all_moves is None: all_moves = self.generateMoves(game_state, player_color)
+        #how large a part was done already, used for progress bar
+        done_c = 0
+        #how many parts there are in total
+        move_c = len(all_moves)
+        #go over all possible moves
+        for move in all_moves:
+            self.checkDeadline()
+            #execute the move on the game state, it is reverted once this move is evaluated
+            undo_token = self.makeMove(game_state, move)
+            #depth specifies how many moves should be predicted in advance. If no more should be predicted, assess game state
+            if depth == 0:
+                move_weights.append(self.evaluate(game_state))
+            else:
+                #find how good the position is for the next player, he will choose the best move for himself
+                move_weights.append(self.findPositionValue(invertColor(player_color), game_state, depth-1, self.compute_progress, importance_mult / move_c))
+            #return game state to how it was before the move
+            self.unmakeMove(game_state, undo_token)
+            #increase amount of done sections
+            done_c += 1
+            #udpdate progress bar
+            self.compute_progress = progress + done_c * importance_mult / move_c
+        return move_weights
+
+    #find value of the position when given player is to move - the best weight of all of his moves. Positions that were searched at least as deep before are taken from the transposition table.
+    def findPositionValue(self, player_color, game_state, depth, progress, importance_mult):
+        key = game_state.getHash(player_color)
+        entry = self.transposition_table.probe(key)
+        #values in the table are from the viewpoint of the player to move, same as for negamax
+        if entry is not None and entry.depth >= depth and entry.bound == BOUND_EXACT:
+            return colorSign(player_color) * entry.value
+        all_moves = self.generateMoves(game_state, player_color)
+        weights = self.findMoveWeights(player_color, game_state, depth, progress, importance_mult, all_moves)
+        #white will choose the largest value, black the smallest one
+        value = max(weights) if player_color == COLOR_WHITE else min(weights)
+        #save value with the best move
+        self.transposition_table.store(key, depth, BOUND_EXACT, colorSign(player_color) * value, all_moves[weights.index(value)], game_state.countAllPieces())
+        return value
+
+
+    #return moves in the order they should be searched in - the best move from the previous search first, then moves capturing more pieces, then promotions
+    def orderMoves(self, player_color, game_state, all_moves, best_move):
+        def moveOrderKey(move):
+            if move == MOVE_PASS: return (False, 0, False)
+            promotes = game_state.at(bitSquare(moveFrom(move))).isNormal() and game_state.isPromotionSquare(bitSquare(moveTo(move)), player_color)
+            return (move == best_move, countBits(moveCaptured(move)), promotes)
+        start = perf_counter()
+        #sort is stable, moves that are equally good keep the order they were generated in
+        order = sorted(all_moves, key=moveOrderKey, reverse=True)
+        self.stats.time_ordering += perf_counter() - start
+        return order
+
+    #value of the position after a move, from the viewpoint of the player who did the move
+    def searchAfterMove(self, player_color, game_state, move, depth, alpha, beta):
+        undo_token = self.makeMove(game_state, move)
+        if depth == 0:
+            value = colorSign(player_color) * self.evaluate(game_state)
+        else:
+            value = -self.negamax(invertColor(player_color), game_state, depth-1, -beta, -alpha)
+        self.unmakeMove(game_state, undo_token)
+        return value
+
+    #find weights of all moves with alpha-beta search. Weights of moves as good as the best one are exact, so that a random one of them can be selected,
+    #others are only guaranteed to be worse. Weights are from the viewpoint of white, same as for findMoveWeights.
+    def findMoveWeightsAlphaBeta(self, player_color, game_state, depth):
+        all_moves = self.generateMoves(game_state, player_color)
+        key = game_state.getHash(player_color)
+        entry = self.transposition_table.probe(key)
+        order = self.orderMoves(player_color, game_state, all_moves, entry.best_move if entry is not None else None)
+
+        #the same move can be listed twice (jumping the same pieces in a different order), it only has to be searched once
+        move_weights = {}
+        best = -float("inf"); best_move = order[0]
+        for done_c, move in enumerate(order):
+            if move in move_weights: continue
+            #search with alpha slightly below the best value - moves just as good as it get exact values instead of only bounds.
+            #Below a win, inf - epsilon would still be inf and the window empty - the largest finite value is used instead, only other wins are above it.
+            alpha = best - WEIGHT_EPSILON if best != float("inf") else sys.float_info.max
+            value = self.searchAfterMove(player_color, game_state, move, depth, alpha, float("inf"))
+            move_weights[move] = colorSign(player_color) * value
+            if value > best:
+                best, best_move = value, move
+            self.compute_progress = (done_c + 1) / len(order)
+        #the best move will be searched first by the next search of this position
+        self.transposition_table.store(key, depth, BOUND_EXACT, best, best_move, game_state.countAllPieces())
+        return [move_weights[move] for move in all_moves]
+
+    #find weights of all moves by searching them in parallel, in worker processes. Every task is searched with a full window, so all weights are exact.
+    def findMoveWeightsParallel(self, player_color, game_state, depth):
+        pool = getProcessPool()
+        all_moves = self.generateMoves(game_state, player_color)
+        #split the search into tasks - one per move, or one per move and reply if there aren't enough moves to keep all processes busy
+        tasks = {(move,) for move in all_moves}
+        if depth > 0 and len(all_moves) < PROCESS_COUNT:
+            tasks = set()
+            for move in all_moves:
+                undo_token = self.makeMove(game_state, move)
+                tasks |= {(move, reply) for reply in self.generateMoves(game_state, invertColor(player_color))}
+                self.unmakeMove(game_state, undo_token)
+        #tasks get the time left for the workers, they stop by themselves when it runs out
+        def submitTask(task):
+            time_left = None if self.deadline is None else self.deadline - perf_counter()
+            return pool.submit(searchMoveSequence, player_color, game_state, depth, task, time_left, process_generation.value)
+        futures = {submitTask(task) : task for task in tasks}
+
+        #task results, weights from the viewpoint of white
+        results = {}
+        pending = set(futures)
+        self.workers_running = True
+        try:
+            while pending:
+                #wait with a timeout, so that cancelling is noticed even when no task finishes for a long time
+                done, pending = wait(pending, timeout = PARALLEL_CANCEL_CHECK_INTERVAL, return_when = FIRST_COMPLETED)
+                #tasks that haven't started yet are dropped, running ones stop by themselves - cancel() changes the generation
+                if self.isCancelled():
+                    self.cancel()
+                    for f in pending: f.cancel()
+                    raise SearchCancelled()
+                for future in done:
+                    #workers return their statistics with the result, they are added to the statistics of this search
+                    value, worker_stats, task_cancelled = future.result()
+                    self.stats.add(worker_stats)
+                    #stopped by a cancel of a different search, this one still needs the result
+                    if task_cancelled:
+                        retry = submitTask(futures[future])
+                        futures[retry] = futures[future]
+                        pending.add(retry)
+                    else:
+                        results[futures[future]] = value
+                self.compute_progress = len(results) / len(tasks)
+        finally:
+            self.workers_running = False
+        if None in results.values(): raise SearchTimeout()
+
+        weights = []
+        for move in all_moves:
+            if (move,) in results:
+                weights.append(results[(move,)])
+            else:
+                #merge replies - the opponent will choose the best one for himself
+                replies = [w for task, w in results.items() if task[0] == move]
+                weights.append(max(replies) if player_color == COLOR_BLACK else min(replies))
+        return weights
+
+    #negamax search with fail-soft alpha-beta pruning. Returns value of the position for the player to move.
+    #If the value is outside of (alpha, beta), it is only a bound - the real one is even further outside.
+    def negamax(self, player_color, game_state, depth, alpha, beta):
+        self.checkDeadline()
+        key = game_state.getHash(player_color)
+        entry = self.transposition_table.probe(key)
+        best_move = None
+        if entry is not None:
+            best_move = entry.best_move
+            #use stored value if the position was searched deep enough and the stored bound is enough to decide
+            if entry.depth >= depth:
+                if entry.bound == BOUND_EXACT: return entry.value
+                if entry.bound == BOUND_LOWER and entry.value >= beta: return entry.value
+                if entry.bound == BOUND_UPPER and entry.value <= alpha: return entry.value
+
+        alpha_start = alpha
+        best = None
+        for move in self.orderMoves(player_color, game_state, self.generateMoves(game_state, player_color), best_move):
+            value = self.searchAfterMove(player_color, game_state, move, depth, alpha, beta)
+            if best is None or value > best:
+                best, best_move = value, move
+            alpha = max(alpha, value)
+            #opponent won't allow this position, as he has a better option already
+            if alpha >= beta: break
+
+        #a search with an empty window only proves a bound that depends on the window, it isn't stored
+        if alpha_start < beta:
+            bound = BOUND_UPPER if best <= alpha_start else (BOUND_LOWER if best >= beta else BOUND_EXACT)
+            self.transposition_table.store(key, depth, bound, best, best_move, game_state.countAllPieces())
+        return best
+
+
+#Pool of processes for the parallel search, created when first needed. There is one for the whole program, creating processes is slow.
+PROCESS_COUNT = os.cpu_count() or 1
+process_pool = None
+#Generation of parallel searches, shared with the worker processes. Every task gets the generation it was started in,
+#cancelling a search increases it, so all tasks started before stop.
+process_generation = None
+def getProcessPool():
+    global process_pool, process_generation
+    if process_pool is None:
+        process_generation = multiprocessing.Value("i", 0)
+        process_pool = ProcessPoolExecutor(max_workers = PROCESS_COUNT, initializer = initWorker, initargs = (process_generation,))
+    return process_pool
+
+#stop worker processes of the parallel search, they are started again when needed.
+#Has to be called before a process that used the parallel search exits, the pool isn't shut down automatically in child processes.
+def shutdownProcessPool():
+    global process_pool
+    if process_pool is not None:
+        process_pool.shutdown(cancel_futures = True)
+        process_pool = None
+
+#search done by a worker process, is kept between tasks so that its transposition table can be reused
+worker_search = None
+
+#runs in a worker process when it starts, saves the shared generation
+def initWorker(generation):
+    global process_generation
+    process_generation = generation
+
+#Runs in a worker process - play the sequence of encoded moves, then return weight of the last move from the viewpoint of white.
+#The first move is played by player_color, the next one by his opponent. Returns (weight, search statistics, whether the task was cancelled),
+#weight is None if the time ran out or the task was cancelled before it finished. Generation is the value of process_generation when the task was submitted.
+def searchMoveSequence(player_color, game_state, depth, moves, time_left, generation):
+    global worker_search
+    if worker_search is None:
+        worker_search = GameSearch(SEARCH_MODE_ALPHA_BETA)
+    worker_search.start_time = perf_counter()
+    worker_search.startStats()
+    #the search object is kept between tasks, the depth of an earlier task must not be reported
+    worker_search.depth_reached = 0
+    task_depth = depth
+    #the value is read without its' lock, it is read for every searched position
+    worker_search.worker_generation = (process_generation.get_obj(), generation)
+    worker_search.deadline = None if time_left is None else perf_counter() + time_left
+    #the table is kept for all tasks, positions of earlier moves of the game aren't needed anymore
+    worker_search.transposition_table.evictUnreachable(game_state.countAllPieces())
+    #play all moves but the last one
+    for move in moves[:-1]:
+        worker_search.makeMove(game_state, move)
+        player_color = invertColor(player_color)
+        depth -= 1
+    cancelled = False
+    try:
+        value = colorSign(player_color) * worker_search.searchAfterMove(player_color, game_state, moves[-1], depth, -float("inf"), float("inf"))
+        worker_search.depth_reached = task_depth
+    except SearchTimeout:
+        value = None
+    except SearchCancelled:
+        value = None
+        cancelled = True
+    finally:
+        worker_search.deadline = None
+        worker_search.worker_generation = None
+        worker_search.finishStats()
+    return value, worker_search.stats, cancelled
+
+
+#if this file was ran instead of main.py, run main instead
+if __name__ == "__main__":
+    import main
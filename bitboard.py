@@ -0,0 +1,275 @@
+from engine_defines import *
+from move_tree import PieceMove, PieceJump, PieceMoveTreeBase, iterateAllPossibleMoves
+
+
+#Bitboard representation of the board. Every square gets one bit, index = x * 8 + y, so iterating bits from the lowest one
+#visits squares in the same order as allBoardPositions(). Only the 32 playable squares are ever set in any mask.
+#Neighbouring squares are then just shifts - moving by (dx, dy) means shifting by dx * 8 + dy.
+BOARD_BITS = gm_board_size_x * gm_board_size_y
+BOARD_MASK = (1 << BOARD_BITS) - 1
+
+#convert square coordinates to bit index and back
+def squareBit(sqr_pos):
+    return sqr_pos[0] * gm_board_size_y + sqr_pos[1]
+
+def bitSquare(bit):
+    return BIT_SQUARES[bit]
+
+#squares for all bit indices, precomputed, as converting bits to tuples is done very often when building move trees
+BIT_SQUARES = [(b // gm_board_size_y, b % gm_board_size_y) for b in range(BOARD_BITS)]
+
+#create a mask with bits of all given squares set
+def squaresMask(squares):
+    mask = 0
+    for sqr_pos in squares:
+        mask |= 1 << squareBit(sqr_pos)
+    return mask
+
+#mask of all 32 playable squares
+PLAYABLE_MASK = squaresMask(pos for pos in allBoardPositions() if isValidSquare(pos))
+#masks of the first and last row - pieces on these cannot move further up/down, shifting them would wrap over to the next column
+ROW_FIRST_MASK = squaresMask((x, 0) for x in range(gm_board_size_x))
+ROW_LAST_MASK  = squaresMask((x, gm_board_size_y - 1) for x in range(gm_board_size_x))
+
+#directions, in the same order as SquareState.getMoveSet uses them
+DIRECTIONS_QUEEN = [(-1, -1), (-1, 1), (1, 1), (1, -1)]
+def directionsNormal(dy):
+    return [(-1, dy), (1, dy)]
+
+#bit shift matching one step in given direction
+def directionShift(direction):
+    return direction[0] * gm_board_size_y + direction[1]
+
+#shift mask by given amount, positive = towards higher bits. Bits falling off the board are thrown away.
+def shiftMask(mask, shift):
+    return ((mask << shift) & BOARD_MASK) if shift > 0 else (mask >> -shift)
+
+#shift all pieces in mask one step in given direction. Pieces that would leave the board disappear.
+def stepMask(mask, direction):
+    #pieces on the first/last row would wrap over to the neighbouring column, remove them first
+    mask &= ~(ROW_LAST_MASK if direction[1] > 0 else ROW_FIRST_MASK)
+    return shiftMask(mask, directionShift(direction))
+
+#iterate over indices of all set bits, from lowest to highest
+def iterBits(mask):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+def countBits(mask):
+    return mask.bit_count()
+
+
+#list of bits a piece would pass when moving from given square in given direction, closest first
+def createRay(sqr_pos, direction):
+    ray = []
+    pos = (sqr_pos[0] + direction[0], sqr_pos[1] + direction[1])
+    while squareInBounds(pos):
+        ray.append(squareBit(pos))
+        pos = (pos[0] + direction[0], pos[1] + direction[1])
+    return ray
+
+#rays for every square and direction - RAYS[bit][direction], precomputed so that move generation doesn't have to check bounds
+RAYS = [{d : createRay(BIT_SQUARES[b], d) for d in DIRECTIONS_QUEEN} for b in range(BOARD_BITS)]
+#rays of queens for every square, in the order they are searched in
+QUEEN_RAYS = [[RAYS[b][d] for d in DIRECTIONS_QUEEN] for b in range(BOARD_BITS)]
+#squares normal pieces can step to, and (jumped square, end square) pairs for their jumps. Indexed by vertical direction, then bit.
+NORMAL_STEPS = {dy : [[RAYS[b][d][0] for d in directionsNormal(dy) if RAYS[b][d]] for b in range(BOARD_BITS)] for dy in (-1, 1)}
+NORMAL_JUMPS = {dy : [[(RAYS[b][d][0], RAYS[b][d][1]) for d in directionsNormal(dy) if len(RAYS[b][d]) >= 2] for b in range(BOARD_BITS)] for dy in (-1, 1)}
+
+
+#Moves can also be encoded as one integer - bits 0-5 hold the start square, bits 6-11 the end square, the rest is a mask of all jumped squares.
+#This describes the whole move, including multiple jumps, which is everything the AI needs. Move trees are only needed by the UI, to show and animate the moves.
+MOVE_TO_SHIFT = 6
+MOVE_CAPTURED_SHIFT = 12
+MOVE_SQUARE_MASK = (1 << MOVE_TO_SHIFT) - 1
+#a player without any moves passes - can't be mistaken for a real move, as square 0 isn't playable
+MOVE_PASS = 0
+
+def encodeMove(from_bit, to_bit, captured_mask):
+    return from_bit | (to_bit << MOVE_TO_SHIFT) | (captured_mask << MOVE_CAPTURED_SHIFT)
+
+#start bit, end bit and mask of jumped pieces of an encoded move
+def moveFrom(move):
+    return move & MOVE_SQUARE_MASK
+
+def moveTo(move):
+    return (move >> MOVE_TO_SHIFT) & MOVE_SQUARE_MASK
+
+def moveCaptured(move):
+    return move >> MOVE_CAPTURED_SHIFT
+
+#encode moves given as a list of move tree nodes, starting with the tree root (same as the ones returned by iterateAllPossibleMoves)
+def encodeMovePath(moves):
+    if len(moves) < 2: return MOVE_PASS
+    captured = 0
+    for move in moves[1:]:
+        pos_jumped = move.getJumpedPos()
+        if pos_jumped is not None: captured |= 1 << squareBit(pos_jumped)
+    return encodeMove(squareBit(moves[0].getEndPos()), squareBit(moves[-1].getEndPos()), captured)
+
+#convert move trees to a flat list of encoded moves, in the same order iterateAllPossibleMoves goes through them. An empty tree gives [MOVE_PASS].
+def flattenMoveTrees(possible_moves):
+    return [encodeMovePath(moves) for moves in iterateAllPossibleMoves(possible_moves)]
+
+#find the list of move tree nodes for an encoded move, used to show and animate moves chosen by AI. Returns None if there isn't such a move.
+#Two jump sequences can only have the same encoding if they jump the same pieces and end at the same square, the first one found is returned then.
+def findMovePath(possible_moves, move):
+    for moves in iterateAllPossibleMoves(possible_moves):
+        if encodeMovePath(moves) == move:
+            return list(moves)
+    return None
+
+
+#Generates moves for one player from bitboards. Produces the same move trees, in the same order, as the square by square search in GameState.
+class BitboardMoveGenerator:
+    def __init__(self, own, queens, enemy, empty, player_color):
+        #own/enemy pieces, all queens and empty squares
+        self.own = own
+        self.queens = queens
+        self.enemy = enemy
+        self.empty = empty
+        #normal pieces of white move down the board, black ones up
+        self.dy = 1 if player_color == COLOR_WHITE else -1
+        self.directions_normal = directionsNormal(self.dy)
+
+    #whether any normal piece can jump - done for all pieces at once using shifts, so the common case of no jumps is cheap
+    def normalPiecesCanJump(self):
+        normal = self.own & ~self.queens
+        for d in self.directions_normal:
+            if stepMask(stepMask(normal, d) & self.enemy, d) & self.empty:
+                return True
+        return False
+
+    #find all jumps, one tree per piece
+    def findAllJumps(self):
+        jumps = []
+        #if no normal piece can jump, only queens have to be searched
+        pieces = self.own if self.normalPiecesCanJump() else self.own & self.queens
+        for bit in iterBits(pieces):
+            if self.queens >> bit & 1:
+                cur_jumps = self.findQueenJumps(bit, 0)
+            else:
+                cur_jumps = self.findNormalJumps(bit, 0, NORMAL_JUMPS[self.dy])
+            if cur_jumps: jumps.append(PieceMoveTreeBase(BIT_SQUARES[bit], cur_jumps))
+        return jumps
+
+    #find all jumps of a normal piece from given bit. Jumped is a mask of enemies jumped already - same as DepthArray, they cannot be jumped again.
+    def findNormalJumps(self, bit, jumped, jump_table):
+        targets = []
+        for enemy_bit, end_bit in jump_table[bit]:
+            #jump is valid if there is a not yet jumped enemy next to the piece and an empty square behind it
+            if (self.enemy & ~jumped) >> enemy_bit & 1 and self.empty >> end_bit & 1:
+                targets.append(PieceJump(BIT_SQUARES[enemy_bit], BIT_SQUARES[end_bit], self.findNormalJumps(end_bit, jumped | (1 << enemy_bit), jump_table)))
+        return targets
+
+    #find all jumps of a queen from given bit. Queens fly over empty squares, already jumped enemies block the way same as any other piece.
+    def findQueenJumps(self, bit, jumped):
+        targets = []
+        empty = self.empty
+        for ray in QUEEN_RAYS[bit]:
+            for i, enemy_bit in enumerate(ray):
+                #empty squares are skipped over
+                if empty >> enemy_bit & 1: continue
+                #first non-empty square - if it is a not yet jumped enemy with an empty square right behind it, the jump is valid
+                if (self.enemy & ~jumped) >> enemy_bit & 1 and i + 1 < len(ray) and empty >> ray[i + 1] & 1:
+                    end_bit = ray[i + 1]
+                    targets.append(PieceJump(BIT_SQUARES[enemy_bit], BIT_SQUARES[end_bit], self.findQueenJumps(end_bit, jumped | (1 << enemy_bit))))
+                break
+        return targets
+
+    #find all normal moves, one tree per piece
+    def findAllMoves(self):
+        moves = []
+        empty = self.empty
+        queens = self.queens
+        steps = NORMAL_STEPS[self.dy]
+        #pieces with at least one empty neighbouring square in their directions - other normal pieces cannot move at all
+        normal = self.own & ~queens
+        movable = self.own & queens
+        for d in self.directions_normal:
+            #shift the reachable empty squares back to the pieces they can be reached from
+            movable |= shiftMask(stepMask(normal, d) & empty, -directionShift(d))
+        for bit in iterBits(movable):
+            if queens >> bit & 1:
+                targets = []
+                for ray in QUEEN_RAYS[bit]:
+                    for target in ray:
+                        #stop at first square that isn't empty
+                        if not empty >> target & 1: break
+                        targets.append(PieceMove(BIT_SQUARES[target]))
+            else:
+                targets = [PieceMove(BIT_SQUARES[target]) for target in steps[bit] if empty >> target & 1]
+            if targets: moves.append(PieceMoveTreeBase(BIT_SQUARES[bit], targets))
+        return moves
+
+    #find all moves for the player - jumps are mandatory, if there are any, normal moves aren't returned
+    def findPossibleMoves(self):
+        jumps = self.findAllJumps()
+        if jumps: return (True, jumps)
+        return (False, self.findAllMoves())
+
+    #The following functions return moves as a flat list of encoded moves instead of trees, in the same order as flattenMoveTrees would.
+
+    #find all jumps, encoded. Only complete jump sequences are returned - a piece has to jump as long as it can.
+    def findAllJumpsFlat(self):
+        jumps = []
+        pieces = self.own if self.normalPiecesCanJump() else self.own & self.queens
+        for bit in iterBits(pieces):
+            if self.queens >> bit & 1:
+                self.collectQueenJumps(bit, bit, 0, jumps)
+            else:
+                self.collectNormalJumps(bit, bit, 0, NORMAL_JUMPS[self.dy], jumps)
+        return jumps
+
+    #add all complete jump sequences of a normal piece starting at from_bit, currently at bit, to the list
+    def collectNormalJumps(self, from_bit, bit, jumped, jump_table, jumps):
+        found = False
+        for enemy_bit, end_bit in jump_table[bit]:
+            if (self.enemy & ~jumped) >> enemy_bit & 1 and self.empty >> end_bit & 1:
+                self.collectNormalJumps(from_bit, end_bit, jumped | (1 << enemy_bit), jump_table, jumps)
+                found = True
+        #if the piece cannot jump any further, the sequence is complete
+        if not found and jumped: jumps.append(encodeMove(from_bit, bit, jumped))
+
+    #same as above, for queens
+    def collectQueenJumps(self, from_bit, bit, jumped, jumps):
+        found = False
+        empty = self.empty
+        for ray in QUEEN_RAYS[bit]:
+            for i, enemy_bit in enumerate(ray):
+                if empty >> enemy_bit & 1: continue
+                if (self.enemy & ~jumped) >> enemy_bit & 1 and i + 1 < len(ray) and empty >> ray[i + 1] & 1:
+                    self.collectQueenJumps(from_bit, ray[i + 1], jumped | (1 << enemy_bit), jumps)
+                    found = True
+                break
+        if not found and jumped: jumps.append(encodeMove(from_bit, bit, jumped))
+
+    #find all normal moves, encoded
+    def findAllMovesFlat(self):
+        moves = []
+        empty = self.empty
+        queens = self.queens
+        steps = NORMAL_STEPS[self.dy]
+        for bit in iterBits(self.own):
+            if queens >> bit & 1:
+                for ray in QUEEN_RAYS[bit]:
+                    for target in ray:
+                        if not empty >> target & 1: break
+                        moves.append(bit | (target << MOVE_TO_SHIFT))
+            else:
+                for target in steps[bit]:
+                    if empty >> target & 1: moves.append(bit | (target << MOVE_TO_SHIFT))
+        return moves
+
+    #find all moves for the player as a flat list of encoded moves. Returns (must_jump, moves), moves are empty if the player cannot move.
+    def findPossibleMovesFlat(self):
+        jumps = self.findAllJumpsFlat()
+        if jumps: return (True, jumps)
+        return (False, self.findAllMovesFlat())
+
+
+#if this file was ran instead of main.py, run main instead
+if __name__ == "__main__":
+    import main
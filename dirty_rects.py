@@ -0,0 +1,38 @@
+import pygame
+from global_defines import *
+
+
+#Keeps track of screen areas that changed, used when g_dirty_rects is enabled.
+#Objects mark their area while drawing a frame when something about them changes, the next frame then clears and draws again only the marked areas,
+#and only these are sent to the display. Objects that change every frame (animations, progress bars) mark their area every frame.
+class DirtyRectTracker:
+    #areas marked since the last frame
+    rects = []
+    #whether the whole screen has to be drawn again, e.g. after switching layouts
+    full = True
+    def __init__(self):
+        self.rects = []
+        self.full = True
+
+    #mark a rectangle, in screen coords, as changed
+    def mark(self, rect):
+        self.rects.append(pygame.Rect(rect))
+
+    #mark the whole screen as changed
+    def markAll(self):
+        self.full = True
+
+    #return (whether the whole screen changed, list of changed rectangles) and start tracking the next frame
+    def takeRects(self):
+        full, rects = self.full, self.rects
+        self.full = False
+        self.rects = []
+        return full, rects
+
+#areas changed on screen, shared by all layouts and objects
+dirty_rects = DirtyRectTracker()
+
+
+#if this file was ran instead of main.py, run main instead
+if __name__ == "__main__":
+    import main
\ No newline at end of file
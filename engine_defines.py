@@ -0,0 +1,62 @@
+#Board size and enums used by the game rules. This file doesn't import pygame, so the engine (game state, move generation and AI search) can be used without it.
+
+gm_board_size_x = 8
+gm_board_size_y = 8
+
+
+#These values are only used to convert ID based representation of game state to an array of SquareStates
+#None = white board spot, no tokens will ever move here
+#Empty = tokens can move here, but none are present right now
+CREATE_PIECE_NONE = 0
+CREATE_PIECE_EMPTY = 1
+CREATE_PIECE_WHITE_NORMAL = 2
+CREATE_PIECE_WHITE_QUEEN = 3
+CREATE_PIECE_BLACK_NORMAL = 4
+CREATE_PIECE_BLACK_QUEEN = 5
+
+#Enum of all player and token colors
+COLOR_NONE = 0
+COLOR_EMPTY = 1
+COLOR_WHITE = 2
+COLOR_BLACK = 3
+
+#Enum of all piece types
+PIECE_TYPE_NONE = 0
+PIECE_TYPE_NORMAL = 1
+PIECE_TYPE_QUEEN = 2
+
+#Enum of all possible game states
+GAME_STATE_UNDECIDED = 0
+GAME_STATE_DRAW = 1
+GAME_STATE_WHITE_WON = 2
+GAME_STATE_BLACK_WON = 3
+
+
+#Return a generator over all board positions
+def allBoardPositions():
+    for x in range(gm_board_size_x):
+        for y in range(gm_board_size_y):
+            yield (x, y)
+
+#compare two sets of coordinates, return true if they are equal
+def positionsEqual(pos1, pos2):
+    return (pos1[0] == pos2[0] and pos1[1] == pos2[1])
+
+#check whether square position is in board bounds
+def squareInBounds(sqr_pos):
+    return (0 <= sqr_pos[0] < gm_board_size_x and 0 <= sqr_pos[1] < gm_board_size_y)
+
+#Assumes default square pattern
+def isValidSquare(sqr_pos):
+    return (squareInBounds(sqr_pos) and (sqr_pos[0] - sqr_pos[1]) % 2)
+
+#invert given color
+def invertColor(color):
+    if color == COLOR_WHITE: return COLOR_BLACK
+    if color == COLOR_BLACK: return COLOR_WHITE
+    return COLOR_NONE
+
+
+#if this file was ran instead of main.py, run main instead
+if __name__ == "__main__":
+    import main
\ No newline at end of file
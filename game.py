@@ -2,11 +2,12 @@ from global_defines import *
 from game_defines import *
 
 from layouts import Layout
-from objects import StaticObject
 from texture_loader import textures
 from game_state import DefaultGameState
 from particle_anim import BlackTileAnimation
 from game_manager import GameManager
+from dirty_rects import dirty_rects
+from profiler import profiler
 
 
 
@@ -15,6 +16,9 @@ from game_manager import GameManager
 class ActiveGame(Layout):    
     game_manager = None
     tile_animation = None
+    #game board texture and its' screen position
+    board_texture = None
+    board_pos = None
     
     white_player = None
     black_player = None
@@ -22,8 +26,9 @@ class ActiveGame(Layout):
     def __init__(self, app):
         #initialize layout
         super().__init__(app)
-        #add static object to layout - this draws game board each frame
-        self.add(StaticObject(textures.get("game board"), 100, 100))
+        #game board, it is drawn each frame together with the tile animation
+        self.board_texture = textures.get("game board")
+        self.board_pos = worldToScreenCoords((100, 100))
 
         #game and players will be initialized later, when swapped to this layout using the setPlayers and resetGame functions
         self.game_manager = None
@@ -32,42 +37,60 @@ class ActiveGame(Layout):
 
         #initialize tile animation - this is responsible for cool effect on black fields
         self.tile_animation = BlackTileAnimation()
+        #screen area of the board - tile animation, pieces and move hints are all drawn inside of it
+        self.board_rect = pygame.Rect(worldToScreenCoords((gm_board_offset_x, gm_board_offset_y)), (int(gm_board_width * g_texture_scale), int(gm_board_height * g_texture_scale)))
 
     #initialize players
     def setPlayers(self, white_player, black_player):
+        #players of the previous game stop computing
+        self.cancelPlayers()
         #set game reference for both players, then save them. Game reference is used for getting moves, checking whether player should play, etc.
         white_player.setGame(self)
         self.white_player = white_player
         black_player.setGame(self)
         self.black_player = black_player
 
+    #get player of given color
+    def getPlayer(self, player_color):
+        return self.white_player if player_color == COLOR_WHITE else self.black_player
+
     #reset game back to default state
     def resetGame(self):
+        self.cancelPlayers()
         self.game_manager = GameManager(self.app, DefaultGameState())
 
+    #stop AI computations of the current game
+    def cancelPlayers(self):
+        for player in (self.white_player, self.black_player):
+            if player is not None: player.cancel()
+
     
     def draw(self, surf, time):
-        #update black tile animation
-        self.tile_animation.update(time)
+        #update black tile animation. It changes every frame, so the whole board has to be drawn again every frame.
+        with profiler.section("particles"):
+            self.tile_animation.update(time)
+        dirty_rects.mark(self.board_rect)
         
         #draw and update both players - draw move hints for humans, draw compute progress bar for AI
-        self.white_player.draw(surf, time)
-        self.black_player.draw(surf, time)
+        with profiler.section("players"):
+            self.white_player.draw(surf, time)
+            self.black_player.draw(surf, time)
 
-        #call parent draw, this updates layout and draws board
+        #call parent draw, this updates layout
         super().draw(surf, time)
 
-        #draw all black squares with animation
-        for sqr_pos in allBoardPositions():
-            if isValidSquare(sqr_pos):
-                self.tile_animation.draw(surf, time, sqr_pos)
+        #draw board with animation on all black squares, this effect changes every frame, so it is drawn separately from the pieces layer
+        with profiler.section("board"):
+            self.tile_animation.drawBoard(surf, time, self.board_texture.get(time), self.board_pos)
         
         #draw all pieces and animations
-        self.game_manager.draw(surf, time)
+        with profiler.section("pieces"):
+            self.game_manager.draw(surf, time)
 
         #draw lines showing currently selected move, these are drawn separately, over pieces
-        self.white_player.drawAfterPieces(surf, time)
-        self.black_player.drawAfterPieces(surf, time)
+        with profiler.section("players"):
+            self.white_player.drawAfterPieces(surf, time)
+            self.black_player.drawAfterPieces(surf, time)
     
     #play and animate given moves    
     def playTurn(self, moves):
@@ -1,7 +1,8 @@
 from texture_loader import textures
 from game_defines import *
 from objects import PygameObject
-from piece_moves import DestroyTokenCommand, EndMoveCommand, PassTurnCommand, PlaceTokenCommand, UpgradePieceCommand, WaitAnimation
+from profiler import profiler
+from piece_moves import DestroyTokenCommand, EndMoveCommand, PassTurnCommand, PlaceTokenCommand, UpgradePieceCommand, WaitAnimation, createMoveAnimations
 
 
 
@@ -65,7 +66,7 @@ class PieceMoveAnimation(GameManagerAnimation):
         animations.append(DestroyTokenCommand(p))
         #do all move animations, these are created from given moves
         for i in range(1, len(moves)):
-            animations = animations + moves[i].createAnimations(moves[i-1].getEndPos())
+            animations = animations + createMoveAnimations(moves[i], moves[i-1].getEndPos())
         #end move by putting token back to the board
         animations.append(PlaceTokenCommand(moves[-1].getEndPos(), game_manager.getGameState().at(p)))
         #pass turn to the other player
@@ -120,6 +121,13 @@ class GameManager:
 
     #reference to application class, used to swap to victory screen when somebody has won
     app = None
+
+    #all pieces that aren't being animated, drawn into one surface over the board. Is drawn again only when the game state changes.
+    pieces_layer = None
+    #game state version the pieces layer was drawn for
+    pieces_layer_version = None
+    #screen position of the upper left corner of the pieces layer
+    pieces_layer_pos = (0, 0)
     def __init__(self, app, game_state):
         #initialize all piece objects
         self.white_piece = PygameObject(textures.get("piece white"))
@@ -133,14 +141,32 @@ class GameManager:
         #find moves available to current player
         self.updateActivePlayerMoves()
         self.app = app
-
-    def draw(self, surf, time):
-        #iterate over all board positions, draw all pieces
+        #the pieces layer covers the whole board
+        self.pieces_layer_pos = worldToScreenCoords((gm_board_offset_x, gm_board_offset_y))
+        self.pieces_layer = None
+        self.pieces_layer_version = None
+
+    #draw all pieces into the pieces layer
+    def updatePiecesLayer(self, time):
+        #drawing into a run length encoded surface decodes and encodes it again for every blit, which is very slow - a new surface is created instead
+        self.pieces_layer = pygame.Surface((int(gm_board_width * g_texture_scale), int(gm_board_height * g_texture_scale)), pygame.SRCALPHA)
         for sqr_pos in allBoardPositions():
             piece_obj = self.getPieceObjectAt(sqr_pos)
             #if there is a piece on current field
             if piece_obj:
-                piece_obj.draw(surf, worldToScreenCoords(squareToWorldCoords(sqr_pos)), time)
+                x, y = worldToScreenCoords(squareToWorldCoords(sqr_pos))
+                #pieces never overlap, so their pixels can be just copied, including alpha. A normal blit would blend them with the transparent layer, making edges darker.
+                self.pieces_layer.blit(piece_obj.texture.get(time), (x - self.pieces_layer_pos[0], y - self.pieces_layer_pos[1]), special_flags=pygame.BLEND_RGBA_MAX)
+        self.pieces_layer_version = self.game_state.version
+        #most of the layer is transparent, run length encoding lets blits skip the transparent parts instead of blending them
+        self.pieces_layer.set_alpha(255, pygame.RLEACCEL)
+
+    def draw(self, surf, time):
+        #draw all pieces, the layer is only updated if a piece moved since the last frame
+        if self.pieces_layer_version != self.game_state.version:
+            with profiler.section("pieces layer"):
+                self.updatePiecesLayer(time)
+        surf.blit(self.pieces_layer, self.pieces_layer_pos)
         #are there any animations left running
         anims_running = False
         for anim in self.running_animations:
@@ -1,24 +1,43 @@
-from game_defines import *
-from piece_moves import PieceMove, PieceJump, PieceMoveTreeBase
-from copy import deepcopy
+from engine_defines import *
+from move_tree import PieceMove, PieceJump, PieceMoveTreeBase
+from bitboard import BitboardMoveGenerator, PLAYABLE_MASK, squareBit, iterBits, bitSquare, encodeMovePath, moveFrom, moveTo, moveCaptured, MOVE_PASS
+from zobrist import ZOBRIST_PIECE_KEYS, ZOBRIST_BLACK_TO_MOVE, ZOBRIST_WHITE_NORMAL, ZOBRIST_WHITE_QUEEN, ZOBRIST_BLACK_NORMAL, ZOBRIST_BLACK_QUEEN
 
 FLAG_MOVES_NORMAL = 1
 FLAG_MOVES_JUMPS = 2
 
 
-#Square state - Holds state of one board square
+#Square state - Holds state of one board square. Square states are immutable and shared - there is only one for every piece id, get it using getSquareState().
 class SquareState:
-    #piece color - NONE/EMPTY/BLACK/WHITE
-    color = COLOR_NONE
-    #piece type - NONE/NORMAL/QUEEN
-    p_type = PIECE_TYPE_NORMAL
+    #piece id - one of CREATE_PIECE_***, color - NONE/EMPTY/BLACK/WHITE, p_type - NONE/NORMAL/QUEEN, kind - see getKind
+    __slots__ = ("piece_id", "color", "p_type", "kind")
     def __init__(self, piece_id):
-        #convert piece id to color & piece type
-        self.color = COLOR_BLACK if (piece_id == CREATE_PIECE_BLACK_NORMAL or piece_id == CREATE_PIECE_BLACK_QUEEN) else\
-                    (COLOR_WHITE if (piece_id == CREATE_PIECE_WHITE_NORMAL or piece_id == CREATE_PIECE_WHITE_QUEEN) else
-                    (COLOR_EMPTY if (piece_id == COLOR_EMPTY) else\
-                     COLOR_NONE))
-        self.p_type = PIECE_TYPE_NORMAL if (piece_id == CREATE_PIECE_WHITE_NORMAL or piece_id == CREATE_PIECE_BLACK_NORMAL) else (PIECE_TYPE_QUEEN if (piece_id == CREATE_PIECE_WHITE_QUEEN or piece_id == CREATE_PIECE_BLACK_QUEEN) else PIECE_TYPE_NONE)
+        #convert piece id to color & piece type. Attributes can only be set here, setattr below doesn't allow changing them.
+        color = COLOR_BLACK if (piece_id == CREATE_PIECE_BLACK_NORMAL or piece_id == CREATE_PIECE_BLACK_QUEEN) else\
+                (COLOR_WHITE if (piece_id == CREATE_PIECE_WHITE_NORMAL or piece_id == CREATE_PIECE_WHITE_QUEEN) else
+                (COLOR_EMPTY if (piece_id == CREATE_PIECE_EMPTY) else\
+                 COLOR_NONE))
+        p_type = PIECE_TYPE_NORMAL if (piece_id == CREATE_PIECE_WHITE_NORMAL or piece_id == CREATE_PIECE_BLACK_NORMAL) else (PIECE_TYPE_QUEEN if (piece_id == CREATE_PIECE_WHITE_QUEEN or piece_id == CREATE_PIECE_BLACK_QUEEN) else PIECE_TYPE_NONE)
+        #piece kind used for hashing and counting pieces - one of ZOBRIST_***, None if there is no piece
+        kind = None
+        if color == COLOR_WHITE: kind = ZOBRIST_WHITE_QUEEN if p_type == PIECE_TYPE_QUEEN else ZOBRIST_WHITE_NORMAL
+        if color == COLOR_BLACK: kind = ZOBRIST_BLACK_QUEEN if p_type == PIECE_TYPE_QUEEN else ZOBRIST_BLACK_NORMAL
+        object.__setattr__(self, "piece_id", piece_id)
+        object.__setattr__(self, "color", color)
+        object.__setattr__(self, "p_type", p_type)
+        object.__setattr__(self, "kind", kind)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("SquareState is shared and cannot be modified, place a different one using GameState.setAt")
+
+    #square states are shared, copies (e.g. when copying the game state) should use the same object
+    def __copy__(self):
+        return self
+    def __deepcopy__(self, memo):
+        return self
+    #when sent to another process, use the shared square state there as well
+    def __reduce__(self):
+        return (getSquareState, (self.piece_id,))
     
     def isEmpty(self):
         return self.color == COLOR_EMPTY
@@ -36,8 +55,15 @@ class SquareState:
         return self.color != COLOR_NONE
     def isEnemyOf(self, target):
         return self.color != target.color and target.color != COLOR_EMPTY and target.color != COLOR_NONE
-    def upgradeToQueen(self):
-        self.p_type = PIECE_TYPE_QUEEN
+    #square state with this piece upgraded to a queen
+    def getUpgraded(self):
+        if self.isWhite(): return getSquareState(CREATE_PIECE_WHITE_QUEEN)
+        if self.isBlack(): return getSquareState(CREATE_PIECE_BLACK_QUEEN)
+        return self
+
+    #piece kind used for hashing and counting pieces - one of ZOBRIST_***, None if there is no piece
+    def getKind(self):
+        return self.kind
 
     #move set is specified by an array a- a[0] represents distance that the piece can travel, a[1] is a list of all supported directions 
     def getMoveSet(self):
@@ -59,6 +85,14 @@ class SquareState:
             return " "
 
 
+#all square states, indexed by piece id
+SQUARE_STATES = [SquareState(piece_id) for piece_id in range(CREATE_PIECE_BLACK_QUEEN + 1)]
+
+#get the shared square state for given piece id (one of CREATE_PIECE_***)
+def getSquareState(piece_id):
+    return SQUARE_STATES[piece_id]
+
+
 
 
 
@@ -87,24 +121,81 @@ class DepthArray:
 class GameState:
     state = None
     jump_depths = None
+    #bitboards - one bit per square, see bitboard.py. Are kept in sync with state by setAt/upgradeAt and used for fast move generation.
+    white_mask = 0
+    black_mask = 0
+    queen_mask = 0
+    #zobrist hash of all pieces, see zobrist.py. Is updated together with the bitboards.
+    hash = 0
+    #count of pieces of every kind, indexed by ZOBRIST_*** piece kinds - white normal, white queen, black normal, black queen. Also updated with the bitboards.
+    piece_counts = None
+    #increased every time a square changes, so that the UI can find out whether the board has to be drawn again
+    version = 0
     def __init__(self, state):
         #create SquareState for every field
-        self.state = [[SquareState(e) for e in r] for r in state]
+        self.state = [[getSquareState(e) for e in r] for r in state]
         #initialize jump depths array
         self.jump_depths = DepthArray(gm_board_size_x, gm_board_size_y)
+        #fill bitboards from the created squares
+        self.white_mask = 0; self.black_mask = 0; self.queen_mask = 0
+        self.hash = 0
+        self.piece_counts = [0, 0, 0, 0]
+        self.version = 0
+        for pos in allBoardPositions():
+            self.updateMasksAt(pos)
 
     def at(self, pos):
         return self.state[pos[1]][pos[0]]
     
     def setAt(self, pos, new):
         self.state[pos[1]][pos[0]] = new
+        self.updateMasksAt(pos)
+
+    #update bits of all masks at given position to match the square there, update the hash as well
+    def updateMasksAt(self, pos):
+        bit_i = squareBit(pos)
+        bit = 1 << bit_i
+        old_kind = self.pieceKindAt(bit_i)
+        new_kind = self.at(pos).getKind()
+        #nothing changes if the same kind of piece is placed where it was already - this happens a lot when moves are undone
+        if old_kind == new_kind: return
+        self.version += 1
+        #remove the old piece from the bitboards, hash and counts
+        if old_kind is not None:
+            self.hash ^= ZOBRIST_PIECE_KEYS[old_kind][bit_i]
+            self.piece_counts[old_kind] -= 1
+            self.white_mask &= ~bit; self.black_mask &= ~bit; self.queen_mask &= ~bit
+        #add the new one
+        if new_kind is not None:
+            self.hash ^= ZOBRIST_PIECE_KEYS[new_kind][bit_i]
+            self.piece_counts[new_kind] += 1
+            if new_kind == ZOBRIST_WHITE_NORMAL or new_kind == ZOBRIST_WHITE_QUEEN: self.white_mask |= bit
+            else: self.black_mask |= bit
+            if new_kind == ZOBRIST_WHITE_QUEEN or new_kind == ZOBRIST_BLACK_QUEEN: self.queen_mask |= bit
+
+    #kind of the piece at given bit according to the bitboards (one of ZOBRIST_*** kinds), None if there is no piece
+    def pieceKindAt(self, bit_i):
+        is_queen = self.queen_mask >> bit_i & 1
+        if self.white_mask >> bit_i & 1:
+            return ZOBRIST_WHITE_NORMAL + is_queen
+        if self.black_mask >> bit_i & 1:
+            return ZOBRIST_BLACK_NORMAL + is_queen
+        return None
+
+    #hash of the position with given player to move
+    def getHash(self, player_color):
+        return self.hash ^ ZOBRIST_BLACK_TO_MOVE if player_color == COLOR_BLACK else self.hash
+
+    #mask of all playable squares without a piece
+    def emptyMask(self):
+        return PLAYABLE_MASK & ~(self.white_mask | self.black_mask)
 
     #destroy piece at given position
     def killAt(self, pos):
-        self.setAt(pos, SquareState(CREATE_PIECE_EMPTY))
+        self.setAt(pos, getSquareState(CREATE_PIECE_EMPTY))
 
     def upgradeAt(self, pos):
-        self.at(pos).upgradeToQueen()
+        self.setAt(pos, self.at(pos).getUpgraded())
 
     #move piece from given pos to new one. Now, is used only for computing AI, as normal moves are done using animations.
     def move(self, pos_from, pos_to):
@@ -112,19 +203,54 @@ class GameState:
         self.setAt(pos_to, self.at(pos_from))
         self.setAt(pos_from, a)
 
+    #whether a normal piece of given color becomes a queen when it ends its move at given position
+    def isPromotionSquare(self, pos, player_color):
+        return pos[1] == (gm_board_size_y - 1 if player_color == COLOR_WHITE else 0)
+
+    #execute moves (a list of move tree nodes, starting with the tree root) in place, including jumps and upgrading to a queen at the end.
+    #Returns a token that can be passed to undo() to revert the moves. This is used by AI instead of copying the whole game state for every move.
+    def apply(self, moves):
+        return self.applyMove(encodeMovePath(moves))
+
+    #same as apply(), with the move encoded as an integer (see bitboard.py)
+    def applyMove(self, move):
+        #empty move - nothing to do
+        if move == MOVE_PASS: return None
+        pos_from = bitSquare(moveFrom(move))
+        pos_to = bitSquare(moveTo(move))
+        piece = self.at(pos_from)
+        #remove all jumped pieces, remember them for undo
+        captured = []
+        for bit in iterBits(moveCaptured(move)):
+            pos_jumped = bitSquare(bit)
+            captured.append((pos_jumped, self.at(pos_jumped)))
+            self.killAt(pos_jumped)
+        #move the piece - empty the start first, the end can be the same square if a queen jumped in a circle
+        self.setAt(pos_from, getSquareState(CREATE_PIECE_EMPTY))
+        promoted = piece.isNormal() and self.isPromotionSquare(pos_to, piece.color)
+        #when promoted, place a queen instead, the original piece is kept for undo
+        self.setAt(pos_to, piece.getUpgraded() if promoted else piece)
+        return (pos_from, pos_to, piece, captured, promoted)
+
+    #revert moves done by apply(), tokens have to be undone in reverse order
+    def undo(self, token):
+        if token is None: return
+        pos_from, pos_to, piece, captured, promoted = token
+        self.killAt(pos_to)
+        self.setAt(pos_from, piece)
+        for pos, captured_piece in captured:
+            self.setAt(pos, captured_piece)
+
     #count pieces of all types. Return a tuple ((w_n, w_q), (b_n, b_q)) - w_n is count of white normal pieces, w_q of white queens. Same for black.
+    #Counts are kept up to date whenever a square changes, so this doesn't have to look at the board at all.
     def countPieces(self):
         #same as wn, wq, bn, bq
-        w0 = 0; w1 = 0; b0 = 0; b1 = 0
-        for pos in allBoardPositions():
-            p = self.at(pos)
-            if p.isWhite():
-                if p.isNormal(): w0 += 1
-                else: w1 += 1
-            if p.isBlack():
-                if p.isNormal(): b0 += 1
-                else: b1 += 1
+        w0, w1, b0, b1 = self.piece_counts
         return (w0, w1), (b0, b1)
+
+    #count of all pieces on the board, of both colors and types
+    def countAllPieces(self):
+        return sum(self.piece_counts)
     
     #identify current game status. Can be - UNDECIDED/WHITE_WON/BLACK_WON/DRAW
     def checkGameStatus(self):
@@ -144,6 +270,9 @@ class GameState:
         #if neither of the above is true, the game hasn't been decided yet
         return GAME_STATE_UNDECIDED
 
+    #The following functions search for moves square by square. They are slow, but simple - findPossibleMovesForPlayerOfColor uses bitboards instead,
+    #these are kept as a reference implementation the bitboard search can be checked against.
+
     #find normal moves for all pieces of given color
     def findAllMoves(self, player_color):
         moves = []
@@ -166,12 +295,10 @@ class GameState:
 
     #generator for all pieces of given player
     def iterOverAllPlayerPieces(self, player_color):
-        #go over all board positions
-        for pos in allBoardPositions():
-            piece = self.at(pos)
-            #if piece is of player color, yield it
-            if piece.isOfColor(player_color):
-                yield pos, piece
+        #go over set bits of the player's mask only - bits are ordered the same way as allBoardPositions()
+        for bit_i in iterBits(self.white_mask if player_color == COLOR_WHITE else self.black_mask):
+            pos = bitSquare(bit_i)
+            yield pos, self.at(pos)
             
     #find all normal moves for a given piece
     def findMoves(self, piece, pos):
@@ -231,8 +358,8 @@ class GameState:
                     break
         return targets
 
-    #find all moves for a player of given color
-    def findPossibleMovesForPlayerOfColor(self, player_color):
+    #find all moves for a player of given color, square by square - reference for the bitboard version below
+    def findPossibleMovesForPlayerOfColorReference(self, player_color):
         #try finding all jumps
         moves = self.findAllJumps(player_color)
         #if there are any, return them, with must_jump flag set to True
@@ -240,9 +367,28 @@ class GameState:
         #otherwise, return all normal moves, must_jump flag is False
         return (False, self.findAllMoves(player_color))
 
-    #return a copy of game state - is used for AI player
+    #create a move generator working with bitboards of this state, from the viewpoint of given player
+    def createMoveGenerator(self, player_color):
+        own, enemy = (self.white_mask, self.black_mask) if player_color == COLOR_WHITE else (self.black_mask, self.white_mask)
+        return BitboardMoveGenerator(own, self.queen_mask, enemy, self.emptyMask(), player_color)
+
+    #find all moves for a player of given color. Returns a tuple (must_jump, moves) - if there are any jumps, only they are returned, as jumping is mandatory.
+    def findPossibleMovesForPlayerOfColor(self, player_color):
+        return self.createMoveGenerator(player_color).findPossibleMoves()
+
+    #same as above, but moves are returned as a flat list of encoded moves, in the same order as when the move trees are flattened. Used by AI.
+    def findPossibleMovesFlat(self, player_color):
+        return self.createMoveGenerator(player_color).findPossibleMovesFlat()
+
+    #return a copy of game state - is used for AI player, once per computed move
+    #Square states are shared and bitboards are plain integers, so only the board rows and counts have to be copied.
     def copy(self):
-        return deepcopy(self)
+        new = GameState.__new__(type(self))
+        new.__dict__.update(self.__dict__)
+        new.state = [list(row) for row in self.state]
+        new.piece_counts = list(self.piece_counts)
+        new.jump_depths = DepthArray(gm_board_size_x, gm_board_size_y)
+        return new
 
     #upgrade all viable pieces to queens
     def upgradeAllViableToQueens(self, game_manager):
@@ -8,6 +8,25 @@ g_screen_width = 1000
 g_screen_height = 1000
 g_texture_scale = 1.0
 
+#Dirty rectangle mode - only parts of the screen that changed are drawn and sent to the display each frame, instead of the whole screen.
+#Saves a lot of time with software rendering, especially on static screens.
+g_dirty_rects = False
+
+#File to append statistics of every AI move to, one json object per line - nodes searched, time spent in each part of the search, ... (see SearchStats in ai_search.py).
+#None to not write them.
+g_search_stats_log = None
+
+#Seconds AI players think about every move. The search then goes as deep as it can in that time (up to MAX_SEARCH_DEPTH from ai_search.py),
+#the difficulty selected in the menu isn't used. None to always search to the depth given by the difficulty.
+g_ai_time_budget = None
+
+#AI moves are searched in a separate process instead of a thread. A thread shares the GIL with drawing, so animations stutter while the AI computes.
+#See ai_process.py.
+g_ai_process = True
+
+#AI players search replies to the moves of a human opponent while he is thinking, the reply to the move he plays is then often ready immediately.
+g_ai_ponder = True
+
 #offset on non-square screens. 
 g_x_offset = max(0, g_screen_width - g_screen_height) // 2
 g_y_offset = max(0, g_screen_height - g_screen_width) // 2
@@ -1,9 +1,12 @@
 from objects import RectangleUIElement, StaticObject, UIElement
 from texture_loader import textures
 from player import HumanPlayer, AIPlayer
+from ai_search import MAX_SEARCH_DEPTH
 from global_defines import *
 from game_defines import GAME_STATE_WHITE_WON, COLOR_BLACK, COLOR_WHITE
-from particle_anim import ParticleAnimation
+from particle_anim import DefaultParticleAnimation
+from dirty_rects import dirty_rects
+from profiler import profiler
 
 
 #Layout holds UI objects and draws them
@@ -109,24 +112,32 @@ class NewGameSettings(Layout):
     #change white difficulty by the given constant. Difficulty is clamped to max 3(or 4 in textures)
     def changeWhiteDifficulty(self, dif):
         self.white_difficulty = min(max(self.white_difficulty + dif, 0), 3)
+        dirty_rects.markAll()
 
     #change black difficulty by the given constant. Difficulty is clamped to max 3(or 4 in textures)
     def changeBlackDifficulty(self, dif):
         self.black_difficulty = min(max(self.black_difficulty + dif, 0), 3)
+        dirty_rects.markAll()
 
     #swap white from human to AI or vice-versa
     def swapWhitePlayer(self):
         self.white_human = not self.white_human
+        #bot difficulty objects appear or disappear, draw everything again
+        dirty_rects.markAll()
 
     #swap black from human to AI or vice-versa
     def swapBlackPlayer(self):
         self.black_human = not self.black_human
+        dirty_rects.markAll()
 
     #start game
     def startGame(self):
         #create a Player object for black and white based on their respective settings
-        w = HumanPlayer(COLOR_WHITE) if self.white_human else AIPlayer(COLOR_WHITE, self.white_difficulty + 2)
-        b = HumanPlayer(COLOR_BLACK) if self.black_human else AIPlayer(COLOR_BLACK, self.black_difficulty + 2)
+        #with a time budget, the search is only limited by the time - the difficulty is replaced by the max depth
+        white_depth = MAX_SEARCH_DEPTH if g_ai_time_budget is not None else self.white_difficulty + 2
+        black_depth = MAX_SEARCH_DEPTH if g_ai_time_budget is not None else self.black_difficulty + 2
+        w = HumanPlayer(COLOR_WHITE) if self.white_human else AIPlayer(COLOR_WHITE, white_depth, time_budget=g_ai_time_budget)
+        b = HumanPlayer(COLOR_BLACK) if self.black_human else AIPlayer(COLOR_BLACK, black_depth, time_budget=g_ai_time_budget)
         #start game with created players
         self.app.startGame(w, b)
 
@@ -145,9 +156,11 @@ class VictoryScreen(Layout):
 
     def draw(self, surf, time):
         #update particle effect
-        self.animation.update(time)
-        #draw particle effect as background
+        with profiler.section("particles"):
+            self.animation.update(time)
+        #draw particle effect as background, it covers the whole screen and changes every frame
         surf.blit(self.animation.getRender(), (0, 0))
+        dirty_rects.markAll()
         #draw win message
         self.win_message.draw(surf, time)
 
@@ -158,7 +171,7 @@ class VictoryScreen(Layout):
         #choose colors for particle effect based on the victor. Meaning - particle color, background color, particle count
         pc, bg, n = ((255, 255, 255), (50, 50, 50), 400) if status == GAME_STATE_WHITE_WON else ((0, 0, 0), (150, 150, 150), 1000)
         #create particle effect with params above
-        self.animation = ParticleAnimation(g_screen_width, g_screen_height, pc, bg, n)
+        self.animation = DefaultParticleAnimation(g_screen_width, g_screen_height, pc, bg, n)
         #set win message texture
         self.win_message.setTexture(self.white_win_tex if self.status == GAME_STATE_WHITE_WON else self.black_win_tex)
 
@@ -1,8 +1,13 @@
-import pygame
+#Worker processes of the parallel AI search import this file as __mp_main__. They only need the engine, which doesn't use pygame - don't load the UI and textures in them.
+if __name__ != "__mp_main__":
+    import pygame
 
-import layouts
-import game
-from global_defines import *
+    import layouts
+    import game
+    from global_defines import *
+    from texture_loader import textures
+    from dirty_rects import dirty_rects
+    from profiler import profiler
 
 
 
@@ -20,6 +25,9 @@ class Application:
 
     #whether app should exit - True if ESC or cross button was pressed
     should_exit = False
+
+    #screen areas drawn in the last frame, None if the whole screen was drawn
+    updated_rects = None
     def __init__(self):
         #create all layouts
         self.game_settings_layout = layouts.NewGameSettings(self)
@@ -30,6 +38,10 @@ class Application:
         self.active_layout = self.game_settings_layout
         #create pygame window and save surface
         self.screen_surface = pygame.display.set_mode((g_screen_width, g_screen_height))
+        #convert textures to the display format, now that there is a display
+        textures.finalize()
+        #textures not needed by the first screen are loaded in the background
+        textures.startPrefetch()
 
     #is called when start game button is pressed, start new game with given players
     def startGame(self, white_player, black_player):
@@ -41,6 +53,8 @@ class Application:
 
     #is called when somebody wins
     def endGame(self, status):
+        #nobody plays anymore
+        self.game_layout.cancelPlayers()
         #swap to victory screen
         self.setLayout(self.victory_screen_layout)
         #tell the victory screen who won
@@ -48,22 +62,49 @@ class Application:
 
     def exit(self):
         self.should_exit = True
+        #running AI searches would keep the app from exiting until they finish
+        self.game_layout.cancelPlayers()
 
     #check events
     def pollEvents(self):
         #exit if user pressed the X button
         for e in pygame.event.get():
+            #profiler keys - show overlay, export trace
+            if profiler.handleEvent(e): continue
             if e.type == pygame.QUIT or (e.type == pygame.KEYDOWN and e.key == pygame.K_ESCAPE):
                 self.exit()
         #pump events - if not called window can stop responding
         pygame.event.pump()
 
     def draw(self, time):
-        self.pollEvents()
-        #fill screen with pitch black
+        with profiler.section("events"):
+            self.pollEvents()
+        #areas changed in the last frame
+        full, rects = dirty_rects.takeRects()
+        if not g_dirty_rects or full:
+            self.updated_rects = None
+            #fill screen with pitch black
+            self.screen_surface.fill((0, 0, 0))
+            #draw current layout
+            with profiler.section("layout"):
+                self.active_layout.draw(self.screen_surface, time)
+            profiler.drawOverlay(self.screen_surface)
+            return
+        #in dirty rect mode, draw only the changed areas. Everything is clipped to them, including the black fill.
+        self.updated_rects = rects
+        self.screen_surface.set_clip(rects[0].unionall(rects[1:]) if rects else pygame.Rect(0, 0, 0, 0))
         self.screen_surface.fill((0, 0, 0))
-        #draw current layout
-        self.active_layout.draw(self.screen_surface, time)
+        with profiler.section("layout"):
+            self.active_layout.draw(self.screen_surface, time)
+        profiler.drawOverlay(self.screen_surface)
+        self.screen_surface.set_clip(None)
+
+    #show the drawn frame - only the changed areas in dirty rect mode, the whole screen otherwise
+    def updateDisplay(self):
+        if self.updated_rects is None:
+            pygame.display.flip()
+        elif self.updated_rects:
+            pygame.display.update(self.updated_rects)
 
     #checked in main game loop
     def running(self):
@@ -72,21 +113,28 @@ class Application:
     #change active layout
     def setLayout(self, target):
         self.active_layout = target
-
-
-
-#Main game loop
-pygame.init()
-game = Application()
-t = 0.0
-#clock for limiting FPS to 60
-clock = pygame.time.Clock()
-while game.running():
-    #increase time by a small bit every frame
-    t += 0.005
-    #draw everything
-    game.draw(t)
-    pygame.display.flip()
-    #limit FPS to 60
-    clock.tick_busy_loop(60)
+        #the new layout has to be drawn whole
+        dirty_rects.markAll()
+
+
+
+#Main game loop. Worker processes of the parallel AI search import this file as __mp_main__, the game must not start in them.
+if __name__ != "__mp_main__":
+    pygame.init()
+    game = Application()
+    t = 0.0
+    #clock for limiting FPS to 60
+    clock = pygame.time.Clock()
+    while game.running():
+        #measure time of every frame, see profiler.py. F3 shows the measured times.
+        profiler.startFrame()
+        #increase time by a small bit every frame
+        t += 0.005
+        #draw everything
+        game.draw(t)
+        with profiler.section("display"):
+            game.updateDisplay()
+        #limit FPS to 60
+        with profiler.section("wait"):
+            clock.tick_busy_loop(60)
 
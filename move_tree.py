@@ -0,0 +1,106 @@
+#Move trees - every possible move of a piece is a path from the tree root to one of its leaves. Only the rules are here, drawing and animating moves is done in piece_moves.py.
+
+#abstract base class for all piece move tree objects
+class PieceMoveTreeNode:
+    #get next moves the piece can do in the same turn, e.g. more jumps in a row
+    def getNextMoves(self):
+        return []
+
+    #execute this move - modify game state as if it had happened
+    def execute(self, game_state, pos_from):
+        pass
+
+    #return move end pos
+    def getEndPos(self):
+        print ("Get pos not implemented. Error.")
+
+    #return position of the piece this move jumps over, None if it doesn't jump
+    def getJumpedPos(self):
+        return None
+
+
+#Moves are represented as a tree - This class forms the root, PieceMove/PieceJump form the rest
+class PieceMoveTreeBase(PieceMoveTreeNode):
+    #where does the move start
+    move_from = [0, 0]
+    #what moves can be done next
+    next_moves = []
+
+    #save from pos and next set of moves
+    def __init__(self, from_pos, next_moves):
+        self.move_from = from_pos
+        self.next_moves = next_moves
+ 
+    def getEndPos(self):
+        #this node only represents beginning of movement, end pos is just move_from
+        return self.move_from
+
+    def getNextMoves(self):
+        return self.next_moves
+
+
+#Moves piece from one spot to another
+class PieceMove(PieceMoveTreeNode):
+    move_to = [0, 0]
+    def __init__(self, m_to):
+        self.move_to = m_to
+
+    def getEndPos(self):
+        return self.move_to
+
+    #move token in game state
+    def execute(self, game_state, from_pos):
+        game_state.move(from_pos, self.move_to)
+
+
+#Move piece from one spot to another, destroy token in between them. Can continue with more jumps
+class PieceJump(PieceMove):
+    move_over = [0, 0]
+    next_jumps = []
+    def __init__(self, m_over, m_to, next_jumps):
+        super().__init__(m_to)
+        self.move_over = m_over
+        self.next_jumps = next_jumps
+
+    def getNextMoves(self):
+        return self.next_jumps
+
+    def getJumpedPos(self):
+        return self.move_over
+
+    def execute(self, game_state, from_pos):
+        #execute move normally
+        super().execute(game_state, from_pos)
+        #destroy the token jumped over
+        game_state.killAt(self.move_over)
+
+
+class EmptyMove(PieceMoveTreeNode):
+    pass
+
+
+#Go through all possible move combinations, used for AI
+def iterateAllPossibleMoves(possible_moves):
+    if not possible_moves:
+        yield [EmptyMove()]
+        return
+    for mv in possible_moves:
+        yield from iterateOverMoves([mv])
+
+#Iterate through one move tree, preorder
+def iterateOverMoves(current_moves):
+    #if there are no next moves, yield current move array
+    next_moves = current_moves[-1].getNextMoves()
+    if len(next_moves) == 0: yield current_moves
+    #if there are next moves, go through all of them
+    for move in next_moves:
+        #add current move to the array
+        current_moves.append(move)
+        #iterate over all of it's child moves
+        yield from iterateOverMoves(current_moves)
+        #remove current move from the array
+        current_moves.pop()
+
+#if this file was ran instead of main.py, run main instead
+if __name__ == "__main__":
+    import main
\ No newline at end of file
@@ -1,6 +1,7 @@
 from texture import DebugTexture
 from collisions import RectangleCollisionDetector
 from global_defines import *
+from dirty_rects import dirty_rects
 
 
 
@@ -22,6 +23,9 @@ class PygameObject:
 #Same as pygame object, but with the same position
 class StaticObject(PygameObject):
     pos = (0, 0)
+    #texture and screen area the object was drawn with last time, used to find out whether it changed
+    drawn_texture = None
+    drawn_rect = None
     
     #create object with texture and given pos
     def __init__(self, tex, x, y):
@@ -29,8 +33,16 @@ class StaticObject(PygameObject):
         super().__init__(tex)
         #save position in screen coords
         self.pos = worldToScreenCoords((x, y))
+        self.drawn_texture = None
+        self.drawn_rect = None
     
     def draw(self, surf, time):
+        #if the texture changed, both the old and the new area have to be drawn again
+        if self.texture is not self.drawn_texture:
+            if self.drawn_rect is not None: dirty_rects.mark(self.drawn_rect)
+            self.drawn_rect = self.texture.get(time).get_rect(topleft=self.pos)
+            dirty_rects.mark(self.drawn_rect)
+            self.drawn_texture = self.texture
         #draw object with given pos
         super().draw(surf, self.pos, time)
 
@@ -67,8 +79,9 @@ class UIElement(StaticObject):
             self.setTexture(self.hover_tex)
             #if is pressed and last press was a long ago
             if mouseLeftButtonPressed() and time - self.last_pressed > 0.1:
-                #call pressed func with params
+                #call pressed func with params, the button is drawn again after being pressed
                 self.pressed_func(*self.pressed_func_params)
+                if self.drawn_rect is not None: dirty_rects.mark(self.drawn_rect)
                 #save current time as last pressed time
                 self.last_pressed = time
         else:
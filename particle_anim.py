@@ -1,5 +1,11 @@
 from game_defines import *
 from random import randint
+#numpy is optional, it is only used for faster particle animations
+try:
+    import numpy
+    from numpy.lib.stride_tricks import as_strided
+except ImportError:
+    numpy = None
 
 
 
@@ -48,29 +54,142 @@ class ParticleAnimation:
     #get rendered surface
     def getRender(self):
         return self.surface_render
-        
+
+
+#Same animation as above, but all particles are moved and drawn at once with numpy, instead of one by one. Can handle tens of thousands of particles.
+#The result is the same as for ParticleAnimation, pixel by pixel. Fading is still done by blitting the alpha overlay, SDL does that faster than numpy could.
+class NumpyParticleAnimation(ParticleAnimation):
+    #particle velocities as an array of shape (particle count, 2)
+    velocities = None
+    #offsets of all pixels of one particle circle from its center, shape (pixel count, 2)
+    circle_offsets = None
+    def __init__(self, render_width, render_height, pcolor, bgcolor, pcount = 100):
+        super().__init__(render_width, render_height, pcolor, bgcolor, pcount)
+        self.velocities = numpy.array(self.particle_velocities, dtype=numpy.float64).reshape(-1, 2)
+        self.circle_offsets = self.findCircleOffsets()
+
+    #find which pixels pygame.draw.circle draws, by drawing one circle into a small surface
+    def findCircleOffsets(self):
+        r = self.particle_radius
+        surf = pygame.Surface((2*r + 3, 2*r + 3))
+        pygame.draw.circle(surf, (255, 255, 255), (r + 1, r + 1), r)
+        xs, ys = numpy.nonzero(pygame.surfarray.array2d(surf))
+        return numpy.stack((xs - (r + 1), ys - (r + 1)), axis=1)
+
+    def update(self, time):
+        r = self.particle_radius
+        #compute positions of all particles, same as in ParticleAnimation
+        pos = (time * self.velocities % (numpy.array((self.render_width, self.render_height)) + 2*r) - r).astype(numpy.int64)
+        #all pixels of all circles, without the ones outside of the surface
+        px = (pos[:, None, 0] + self.circle_offsets[None, :, 0]).ravel()
+        py = (pos[:, None, 1] + self.circle_offsets[None, :, 1]).ravel()
+        inside = (px >= 0) & (px < self.render_width) & (py >= 0) & (py < self.render_height)
+        #draw them directly into the surface, the surface stays locked while the pixel array exists
+        pixels = pygame.surfarray.pixels3d(self.surface_render)
+        pixels[px[inside], py[inside]] = self.particle_color
+        del pixels
+        #draw alpha overlay - responsible for fading particle tails
+        self.surface_render.blit(self.surface_alpha_overlay, (0, 0))
+
+
+#the fastest particle animation available
+DefaultParticleAnimation = NumpyParticleAnimation if numpy is not None else ParticleAnimation
 
     
 
 
 #Particle effect on the background of black fields. To use less performance that will be used for AI/..., there is only one particle animation, into which there are multiple viewports.
-class BlackTileAnimation(ParticleAnimation):
+class BlackTileAnimation(DefaultParticleAnimation):
     #how much does viewport shift when moving one field
     shift_x = 25
     shift_y = 25
+    #board texture with the effect on black squares, drawn with one blit. Only used with numpy, when squares are laid out in a regular grid.
+    board_layer = None
+    #board surface the layer was created from, the layer is created again when it changes
+    board_layer_source = None
+    #(x coords, y coords) of all black squares - the mask of squares with the effect, as index arrays
+    square_mask = None
+    #screen position of square (0, 0) and distance between neighbouring squares on screen, None if squares aren't in a regular grid
+    square_grid = None
 
     def __init__(self):
         #compute render width and height from viewport shift and tile radius
         self.width  = gm_tile_width  + gm_board_size_x * self.shift_x
         self.height = gm_tile_height + gm_board_size_y * self.shift_y
         super().__init__(self.width, self.height, (64, 64, 64), (0, 0, 0))
+        #screen position and viewport of every black square, they never change
+        self.viewports = [self.getViewport(sqr_pos) for sqr_pos in allBoardPositions() if isValidSquare(sqr_pos)]
+        #index arrays select blocks from the views below faster than a boolean mask
+        if numpy is not None:
+            self.square_mask = numpy.nonzero([[isValidSquare((x, y)) for y in range(gm_board_size_y)] for x in range(gm_board_size_x)])
+        self.square_grid = self.findSquareGrid()
+        self.board_layer = None
+        self.board_layer_source = None
 
-    #draw one square with given pos
-    def draw(self, surf, time, sqr_pos):
+    #return (screen position, viewport rectangle) for square with given pos
+    def getViewport(self, sqr_pos):
         dist = worldToScreenCoords(squareToWorldCoords(sqr_pos))
         circle_x = self.shift_x * sqr_pos[0]
         circle_y = self.shift_y * sqr_pos[1]
-        surf.blit(self.getRender(), dist, pygame.Rect(circle_x, circle_y, gm_tile_width, gm_tile_height), pygame.BLEND_MAX)  
+        return (dist, pygame.Rect(circle_x, circle_y, gm_tile_width, gm_tile_height))
+
+    #return (position of square (0, 0), step) if all squares are the same distance apart on screen and don't overlap, None otherwise (e.g. for some texture scales)
+    def findSquareGrid(self):
+        origin = worldToScreenCoords(squareToWorldCoords((0, 0)))
+        step = tuple(a - b for a, b in zip(worldToScreenCoords(squareToWorldCoords((1, 1))), origin))
+        if step[0] < gm_tile_width or step[1] < gm_tile_height: return None
+        for sqr_pos in allBoardPositions():
+            if worldToScreenCoords(squareToWorldCoords(sqr_pos)) != (origin[0] + sqr_pos[0] * step[0], origin[1] + sqr_pos[1] * step[1]): return None
+        return (origin, step)
+
+    #draw one square with given pos
+    def draw(self, surf, time, sqr_pos):
+        dist, viewport = self.getViewport(sqr_pos)
+        surf.blit(self.getRender(), dist, viewport, pygame.BLEND_MAX)  
+
+    #draw all black squares at once
+    def drawAll(self, surf, time):
+        render = self.getRender()
+        surf.blits([(render, dist, viewport, pygame.BLEND_MAX) for dist, viewport in self.viewports], doreturn=False)
+
+    #draw board surface at given screen pos together with the effect on all black squares.
+    #The board is expected to be drawn over black, and to be transparent on black squares - whatever is under them stays visible, same as with drawAll.
+    def drawBoard(self, surf, time, board, board_pos):
+        if numpy is None or self.square_grid is None or not self.boardContainsSquares(board, board_pos):
+            surf.blit(board, board_pos)
+            self.drawAll(surf, time)
+            return
+        if board is not self.board_layer_source:
+            self.createBoardLayer(board)
+        self.updateBoardLayer(board_pos)
+        #everything is drawn by one blit - board squares are drawn over black in the layer already, so the maximum is the same as blending them
+        surf.blit(self.board_layer, board_pos, None, pygame.BLEND_MAX)
+
+    #whether all squares are inside of the board surface drawn at given pos - the layer views don't check bounds
+    def boardContainsSquares(self, board, board_pos):
+        (origin_x, origin_y), (step_x, step_y) = self.square_grid
+        x, y = origin_x - board_pos[0], origin_y - board_pos[1]
+        return x >= 0 and y >= 0 and x + (gm_board_size_x - 1) * step_x + gm_tile_width <= board.get_width() and y + (gm_board_size_y - 1) * step_y + gm_tile_height <= board.get_height()
+
+    #create the layer - board drawn over black, in the same pixel format as the particle render, so that pixels can be copied between them directly
+    def createBoardLayer(self, board):
+        self.board_layer = pygame.Surface(board.get_size(), 0, self.surface_render)
+        self.board_layer.fill((0, 0, 0))
+        self.board_layer.blit(board, (0, 0))
+        self.board_layer_source = board
+
+    #copy viewports of all black squares from the render into the layer at once.
+    #Both surfaces are viewed as 4D arrays indexed by (square x, square y, pixel x, pixel y), offsets of viewports and squares are given by strides of these views.
+    def updateBoardLayer(self, board_pos):
+        (origin_x, origin_y), (step_x, step_y) = self.square_grid
+        shape = (gm_board_size_x, gm_board_size_y, gm_tile_width, gm_tile_height)
+        render = pygame.surfarray.pixels2d(self.surface_render)
+        layer = pygame.surfarray.pixels2d(self.board_layer)[origin_x - board_pos[0]:, origin_y - board_pos[1]:]
+        viewports = as_strided(render, shape, (self.shift_x * render.strides[0], self.shift_y * render.strides[1]) + render.strides, writeable=False)
+        squares = as_strided(layer, shape, (step_x * layer.strides[0], step_y * layer.strides[1]) + layer.strides)
+        squares[self.square_mask] = viewports[self.square_mask]
+        #the surfaces stay locked while views of their pixels exist
+        del render, layer, viewports, squares
 
 
 
@@ -0,0 +1,146 @@
+from engine_defines import *
+from game_state import GameState, DefaultGameState
+from move_tree import iterateAllPossibleMoves
+from time import perf_counter
+import argparse
+import sys
+
+
+#Perft - count all move sequences (leaf nodes) of given length from a position. Used to measure speed of move generation and to check that
+#a faster generator finds exactly the same moves as the original one. Runs without a window, nothing is drawn and no textures are loaded.
+
+#Positions to count moves from - (name, board in the same format as for GameState, player to move, {depth : leaf count}).
+#Leaf counts were recorded with the original square walking generator (findPossibleMovesForPlayerOfColorReference).
+PERFT_POSITIONS = [
+    #board None is the default starting position
+    ("start", None, COLOR_WHITE, {1 : 7, 2 : 49, 3 : 302, 4 : 1469, 5 : 7361, 6 : 36768, 7 : 179740, 8 : 845931}),
+    #a normal piece with a choice of multiple jumps
+    ("multi jump", [
+        [0, 1, 0, 1, 0, 1, 0, 1],
+        [1, 0, 2, 0, 1, 0, 1, 0],
+        [0, 4, 0, 4, 0, 1, 0, 1],
+        [1, 0, 1, 0, 1, 0, 1, 0],
+        [0, 4, 0, 4, 0, 4, 0, 1],
+        [1, 0, 1, 0, 1, 0, 1, 0],
+        [0, 1, 0, 4, 0, 1, 0, 1],
+        [4, 0, 1, 0, 1, 0, 4, 0]
+    ], COLOR_WHITE, {1 : 3, 2 : 29, 3 : 99, 4 : 653, 5 : 2070, 6 : 13097, 7 : 58701, 8 : 373521}),
+    #queens on both sides, flying moves and jumps
+    ("queens", [
+        [0, 1, 0, 1, 0, 1, 0, 1],
+        [3, 0, 1, 0, 1, 0, 2, 0],
+        [0, 1, 0, 4, 0, 1, 0, 1],
+        [1, 0, 1, 0, 1, 0, 1, 0],
+        [0, 1, 0, 4, 0, 1, 0, 1],
+        [1, 0, 2, 0, 1, 0, 1, 0],
+        [0, 5, 0, 1, 0, 4, 0, 1],
+        [1, 0, 1, 0, 1, 0, 3, 0]
+    ], COLOR_BLACK, {1 : 9, 2 : 21, 3 : 66, 4 : 278, 5 : 1462, 6 : 12152, 7 : 82448, 8 : 858413}),
+    #pieces one move from promotion
+    ("promotion", [
+        [0, 1, 0, 1, 0, 1, 0, 1],
+        [4, 0, 1, 0, 1, 0, 1, 0],
+        [0, 1, 0, 2, 0, 1, 0, 1],
+        [1, 0, 1, 0, 1, 0, 1, 0],
+        [0, 1, 0, 1, 0, 4, 0, 1],
+        [1, 0, 1, 0, 1, 0, 1, 0],
+        [0, 2, 0, 1, 0, 4, 0, 2],
+        [1, 0, 1, 0, 1, 0, 1, 0]
+    ], COLOR_WHITE, {1 : 5, 2 : 21, 3 : 95, 4 : 361, 5 : 2153, 6 : 8720, 7 : 60355, 8 : 278995}),
+]
+
+
+#create game state for a stored position
+def createPosition(board):
+    return DefaultGameState() if board is None else GameState(board)
+
+#count leaf nodes using the generator used by AI - flat lists of encoded moves, applied and undone on the same game state.
+#Depth 0 is the position itself. A player without moves has lost, so a position without moves has no leaves below it.
+def perft(game_state, player_color, depth):
+    if depth == 0: return 1
+    must_jump, moves = game_state.findPossibleMovesFlat(player_color)
+    #leaves are counted without applying the last move
+    if depth == 1: return len(moves)
+    nodes = 0
+    for move in moves:
+        undo_token = game_state.applyMove(move)
+        nodes += perft(game_state, invertColor(player_color), depth - 1)
+        game_state.undo(undo_token)
+    return nodes
+
+#count leaf nodes using move trees - the bitboard generator, or the original square walking one if reference is set
+def perftTrees(game_state, player_color, depth, reference = False):
+    if depth == 0: return 1
+    if reference:
+        must_jump, possible_moves = game_state.findPossibleMovesForPlayerOfColorReference(player_color)
+    else:
+        must_jump, possible_moves = game_state.findPossibleMovesForPlayerOfColor(player_color)
+    if not possible_moves: return 0
+    nodes = 0
+    for moves in iterateAllPossibleMoves(possible_moves):
+        undo_token = game_state.apply(moves)
+        nodes += perftTrees(game_state, invertColor(player_color), depth - 1, reference)
+        game_state.undo(undo_token)
+    return nodes
+
+#count leaf nodes separately for each move of the player to move, useful to find which move a wrong count comes from
+def perftDivide(game_state, player_color, depth):
+    must_jump, moves = game_state.findPossibleMovesFlat(player_color)
+    counts = []
+    for move in moves:
+        undo_token = game_state.applyMove(move)
+        counts.append((move, perft(game_state, invertColor(player_color), depth - 1)))
+        game_state.undo(undo_token)
+    return counts
+
+#run function, return its result and how long it took in seconds
+def timed(function, *args):
+    start = perf_counter()
+    result = function(*args)
+    return result, perf_counter() - start
+
+
+#count leaves of all stored positions to given depth, print counts and speed. If check is set, counts are also done with the tree generators.
+#Returns False if any count doesn't match another generator or a recorded value.
+def runPerft(max_depth, positions, check = False):
+    ok = True
+    for name, board, color, recorded in positions:
+        game_state = createPosition(board)
+        print(name)
+        for depth in range(1, max_depth + 1):
+            nodes, secs = timed(perft, game_state, color, depth)
+            line = "  depth %d: %12d leaves  %8.3f s  %10.0f leaves/s" % (depth, nodes, secs, nodes / secs if secs > 0 else 0.0)
+            expected = {"recorded" : recorded.get(depth)}
+            if check:
+                expected["trees"], secs_trees = timed(perftTrees, game_state, color, depth)
+                expected["reference"], secs_reference = timed(perftTrees, game_state, color, depth, True)
+                line += "  (trees %.3f s, reference %.3f s)" % (secs_trees, secs_reference)
+            for source, count in expected.items():
+                if count is not None and count != nodes:
+                    line += "  MISMATCH with %s: %d" % (source, count)
+                    ok = False
+            print(line)
+    return ok
+
+
+def main(args):
+    parser = argparse.ArgumentParser(description = "Count move sequences from stored positions to measure speed and correctness of move generation.")
+    parser.add_argument("depth", type = int, nargs = "?", default = 6, help = "max depth to count to")
+    parser.add_argument("--check", action = "store_true", help = "also count with move trees and the original generator and compare")
+    parser.add_argument("--position", help = "only count from the position with this name")
+    parser.add_argument("--divide", action = "store_true", help = "print leaf counts for each move of the first selected position")
+    args = parser.parse_args(args)
+
+    positions = [p for p in PERFT_POSITIONS if args.position is None or p[0] == args.position]
+    if not positions:
+        parser.error("unknown position %s, stored positions are: %s" % (args.position, ", ".join(p[0] for p in PERFT_POSITIONS)))
+    if args.divide:
+        name, board, color, recorded = positions[0]
+        for move, nodes in perftDivide(createPosition(board), color, args.depth):
+            print("%08x: %d" % (move, nodes))
+        return 0
+    return 0 if runPerft(args.depth, positions, args.check) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
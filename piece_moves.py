@@ -1,4 +1,5 @@
 from game_defines import *
+from move_tree import PieceMoveTreeNode, PieceMoveTreeBase, PieceMove, PieceJump, EmptyMove, iterateAllPossibleMoves, iterateOverMoves
 import pygame
 
 #animation class - a common base for moving animations
@@ -107,110 +108,35 @@ class UpgradePieceCommand(Animation):
         game_manager.getGameState().upgradeAt(self.pos)
 
 
-#abstract base class for all piece move tree objects
-class PieceMoveTreeNode:
-    #get next moves the piece can do in the same turn, e.g. more jumps in a row
-    def getNextMoves(self):
-        return []
-
-    #draw the move
-    def draw(self, surf, point_color):
-        pass
-
-    #create animations for moving the piece
-    def createAnimations(self, pos_from):
-        return []
-
-    #execute this move - modify game state as if it had happened
-    def execute(self, game_state, pos_from):
-        pass
-
-    #return move end pos
-    def getEndPos(self):
-        print ("Get pos not implemented. Error.")
-
-
-#Moves are represented as a tree - This class forms the root, PieceMove/PieceJump form the rest
-class PieceMoveTreeBase(PieceMoveTreeNode):
-    #where does the move start
-    move_from = [0, 0]
-    #what moves can be done next
-    next_moves = []
-
-    #save from pos and next set of moves
-    def __init__(self, from_pos, next_moves):
-        self.move_from = from_pos
-        self.next_moves = next_moves
- 
-    def getEndPos(self):
-        #this node only represents beginning of movement, end pos is just move_from
-        return self.move_from
-
-    def getNextMoves(self):
-        return self.next_moves
-
-
-#Moves piece from one spot to another
-class PieceMove(PieceMoveTreeNode):
-    move_to = [0, 0]
-    def __init__(self, m_to):
-        self.move_to = m_to
-
-    def getEndPos(self):
-        return self.move_to
-
-    def draw(self, surf, move_from, line_color, cross_color, point_color):
-        #p1 - move start, p2 - move end
-        p1 = squareCenterToScreenCoords(move_from)
-        p2 = squareCenterToScreenCoords(self.move_to)
-        #draw a line between start and end point
-        pygame.draw.line(surf, line_color, p1, p2, 2)
-        #move circle on end point
-        pygame.draw.circle(surf, point_color, p2, 5)
-
-    #move token from first to second pos
-    def createAnimations(self, pos_from):
-        return [MoveAnimation(0.15, pos_from, self.move_to)]
-
-    #move token in game state
-    def execute(self, game_state, from_pos):
-        game_state.move(from_pos, self.move_to)
-
-
-#Move piece from one spot to another, destroy token in between them. Can continue with more jumps
-class PieceJump(PieceMove):
-    move_over = [0, 0]
-    next_jumps = []
-    def __init__(self, m_over, m_to, next_jumps):
-        super().__init__(m_to)
-        self.move_over = m_over
-        self.next_jumps = next_jumps
-
-    def getNextMoves(self):
-        return self.next_jumps
-
-    def draw(self, surf, move_from, line_color, cross_color, point_color):
-        #draw line between start and end points, same as for PieceMove
-        super().draw(surf, move_from, line_color, cross_color, point_color)
-        #draw a cross over the token to destroy
-        p2 = squareCenterToScreenCoords(self.move_over)
+#Drawing and animations of move tree nodes, the nodes themselves are in move_tree.py
+
+#draw a move from move_from - a line to the end square and a cross over the piece jumped over. The tree root isn't drawn, it doesn't move anywhere.
+def drawMove(surf, move, move_from, line_color, cross_color, point_color):
+    if not isinstance(move, PieceMove): return
+    #p1 - move start, p2 - move end
+    p1 = squareCenterToScreenCoords(move_from)
+    p2 = squareCenterToScreenCoords(move.getEndPos())
+    #draw a line between start and end point
+    pygame.draw.line(surf, line_color, p1, p2, 2)
+    #move circle on end point
+    pygame.draw.circle(surf, point_color, p2, 5)
+    #draw a cross over the token to destroy
+    pos_jumped = move.getJumpedPos()
+    if pos_jumped is not None:
+        p2 = squareCenterToScreenCoords(pos_jumped)
         pygame.draw.line(surf, cross_color, (p2[0] - 5, p2[1] - 5), (p2[0] + 5, p2[1] + 5), 3)
         pygame.draw.line(surf, cross_color, (p2[0] - 5, p2[1] + 5), (p2[0] + 5, p2[1] - 5), 3)
 
-    #create animations - move to the token to jump over, destroy it, then continue move to target square
-    def createAnimations(self, pos_from):
-        return [MoveAnimation(0.1, pos_from, self.move_over), DestroyTokenCommand(self.move_over), MoveAnimation(0.1, self.move_over, self.move_to)]
-
-    
-    def execute(self, game_state, from_pos):
-        #execute move normally
-        super().execute(game_state, from_pos)
-        #destroy the token jumped over
-        game_state.killAt(self.move_over)
-
-
-class EmptyMove(PieceMoveTreeNode):
-    pass
+#create animations for moving the piece from pos_from
+def createMoveAnimations(move, pos_from):
+    pos_jumped = move.getJumpedPos()
+    #jump - move to the token to jump over, destroy it, then continue move to target square
+    if pos_jumped is not None:
+        return [MoveAnimation(0.1, pos_from, pos_jumped), DestroyTokenCommand(pos_jumped), MoveAnimation(0.1, pos_jumped, move.getEndPos())]
+    #move token from first to second pos
+    if isinstance(move, PieceMove):
+        return [MoveAnimation(0.15, pos_from, move.getEndPos())]
+    return []
 
 
 #if this file was ran instead of main.py, run main instead
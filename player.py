@@ -1,15 +1,22 @@
 from global_defines import *
 from game_defines import *
-from random import randint
 import threading
 import pygame
-from piece_moves import EmptyMove
+from ai_search import GameSearch, SEARCH_MODE_ALPHA_BETA, listAllMoves
+from bitboard import MOVE_PASS
+from ai_process import AIPlayerProcess
+from transposition import getPersistentTable
+from piece_moves import drawMove
+from dirty_rects import dirty_rects
+from profiler import profiler
 
 #Player abstract base class
 class Player:
     color = None
     game = None
     next_move = None
+    #whether moves are chosen by a person - AI players only ponder while a person is thinking, pondering would slow down another AI
+    is_human = False
     def __init__(self, color, game = None):
         self.color = color
         self.game = game
@@ -23,12 +30,17 @@ class Player:
     def drawAfterPieces(self, surf, time):
         pass
 
+    #stop everything the player is doing for the current game, is called when the game is left
+    def cancel(self):
+        pass
+
     def shouldPlay(self):
         return self.game.isTurnOf(self.color)
 
 
 #Manages one human player
 class HumanPlayer(Player):
+    is_human = True
     #currently selected moves
     current_moves = []
     def __init__(self, color, game = None):
@@ -77,11 +89,9 @@ class HumanPlayer(Player):
         #if there are any moves to draw
         if self.current_moves:
             red = (255, 0, 0); green = (0, 255, 0)
-            #draw the first move(tree root)
-            self.current_moves[0].draw(surf, red)
-            #go through the rest of the moves, draw each one
+            #go through the moves after the first one(tree root), draw each one
             for i in range(1, len(self.current_moves)):
-                self.current_moves[i].draw(surf, self.current_moves[i-1].getEndPos(), green, red, red)
+                drawMove(surf, self.current_moves[i], self.current_moves[i-1].getEndPos(), green, red, red)
 
             #draw a line if there is a next move to the square being hovered
             mouse_pos = worldToSquareCoords(mouseWorldCoords())
@@ -89,126 +99,33 @@ class HumanPlayer(Player):
             for next_move in self.current_moves[-1].getNextMoves():
                 #if mouse is inside the next move, draw the line
                 if positionsEqual(next_move.getEndPos(), mouse_pos):
-                    next_move.draw(surf, self.current_moves[-1].getEndPos(), green, red, red)
-
-
-#Go through all possible move combinations, used for AI
-def iterateAllPossibleMoves(possible_moves):
-    if not possible_moves:
-        yield [EmptyMove()]
-        return
-    for mv in possible_moves:
-        yield from iterateOverMoves([mv])
-
-#Iterate through one move tree, preorder
-def iterateOverMoves(current_moves):
-    #if there are no next moves, yield current move array
-    next_moves = current_moves[-1].getNextMoves()
-    if len(next_moves) == 0: yield current_moves
-    #if there are next moves, go through all of them
-    for move in next_moves:
-        #add current move to the array
-        current_moves.append(move)
-        #iterate over all of it's child moves
-        yield from iterateOverMoves(current_moves)
-        #remove current move from the array
-        current_moves.pop()
-
+                    drawMove(surf, next_move, self.current_moves[-1].getEndPos(), green, red, red)
 
 
 #A thread used for AI player to not stop the game completely when the AI is computing its' next move.
 class AIPlayerThread:
     #thread handle
     thread = None
-    #how large a part of the computation was finished already, in percent
-    compute_progress = 0.0
-    def __init__(self, color, game_state, depth):
+    #search being run by the thread
+    search = None
+    #table key - searches with the same key share the transposition table, see getPersistentTable. None for a new table.
+    def __init__(self, color, game_state, depth, search_mode = SEARCH_MODE_ALPHA_BETA, time_budget = None, stats_log = None, table_key = None):
+        table = getPersistentTable(table_key) if table_key is not None else None
+        self.search = GameSearch(search_mode, table, stats_log)
         #create a new thread
-        self.thread = threading.Thread(target=self.start, args=(color, game_state, depth))
+        self.thread = threading.Thread(target=self.start, args=(color, game_state, depth, time_budget))
         #result to be computed by the thread
         self.result = None
         #start the computation
         self.thread.start()
 
-    def start(self, color, game_state, depth):
+    def start(self, color, game_state, depth, time_budget):
         #compute optimal move
-        self.result = self.findOptimalMove(color, game_state, depth)
-
-    def findOptimalMove(self, color, game_state, depth):
-        possible_moves = None
-        try:
-            #find possible moves for current game
-            must_jump, possible_moves = game_state.findPossibleMovesForPlayerOfColor(color)
-            #find how good each of previously found moves is
-            weights = self.findMoveWeights(color, game_state, depth)
-            #weights are done from the viewpoint of white -> larger numbers are good for him. Select min/max number based on player color
-            target = max(weights) if color == COLOR_WHITE else min(weights)
-            
-            #how many weights are there with the same value as target, then select a random move. This is done to prevent AI from looping the same move over and over again.
-            count = sum([1 if abs(target-w) < 1e-10 else 0 for w in weights])
-            #index of the move to select
-            a = randint(0, count - 1)
-            
-            a_i = 0
-            i = 0
-            #go through all possible moves, select the one with the correct index
-            for moves in iterateAllPossibleMoves(possible_moves):
-                if abs(weights[i] - target) < 1e-10:
-                    if a_i == a:
-                        return moves
-                    a_i += 1
-                i += 1
-            print("Move with correct index not found.")
-            #return first available move
-            for moves in iterateAllPossibleMoves(possible_moves):
-                return moves
-        #If AI crashes for any reason, return first possible move, better than having the game freeze.
-        except:
-            for moves in iterateAllPossibleMoves(possible_moves):
-                return moves
+        self.result = self.search.findOptimalMove(color, game_state, depth, time_budget)
 
-        
-    def findMoveWeights(self, player_color, game_state, depth, progress = 0.0, importance_mult = 1.0):
-        #progress bar explanation - progress marks the part of bar done already, importance mult is the change, which will occur after this instance of the function finishes running
-        #Since this function can be split into multiple parts(total mark_c), one for each move, progress bar can be updated once per each part completion
-
-        #how good is each individual move for the white player
-        move_weights = []
-        #find all possible moves
-        must_jump, possible_moves = game_state.findPossibleMovesForPlayerOfColor(player_color)
-        #how large a part was done already, used for progress bar
-        done_c = 0
-        #how many parts there are in total
-        move_c = sum(1 for m in iterateAllPossibleMoves(possible_moves))
-        #go over all possible moves
-        for moves in iterateAllPossibleMoves(possible_moves):
-            #create new game state, then execute moves on it
-            new_game_state = game_state.copy()
-            for i in range(1, len(moves)):
-                moves[i].execute(new_game_state, moves[i-1].getEndPos())
-            #depth specifies how many moves should be predicted in advance. If no more should be predicted, assess game state
-            if depth == 0:
-                #count pieces
-                w, b = new_game_state.countPieces()
-                #value on each side, queen is equal to three normal pieces
-                val_w = w[0] + 3*w[1]; val_b = b[0] + 3*b[1]
-                #assess how good the position is for the white player - ratio of white to black pieces
-                ratio_w = float("inf") if val_b == 0 else val_w / val_b
-                #append computed weight to the list
-                move_weights.append(ratio_w)
-            else:
-                #find weights for the next set of moves
-                weights = self.findMoveWeights(invertColor(player_color), new_game_state, depth-1, self.compute_progress, importance_mult / move_c)
-                #if current player is black, the next one is white -> he will chose the best move for himself, or the largest value. Black will chose the smallest one.
-                if player_color == COLOR_BLACK:
-                    move_weights.append(max(weights))
-                else:
-                    move_weights.append(min(weights))
-            #increase amount of done sections
-            done_c += 1
-            #udpdate progress bar
-            self.compute_progress = progress + done_c * importance_mult / move_c
-        return move_weights
+    #stop the computation - the thread finishes soon after and the result stays None
+    def cancel(self):
+        self.search.cancel()
 
     #get computed result, or none if there isn't one yet
     def getResult(self):
@@ -218,30 +135,93 @@ class AIPlayerThread:
     def isAlive(self):
         return self.thread.is_alive()
 
-    #how large a part was done already, in percent
+    #how large a part was done already, in percent. When searching with a time budget, this is the part of the budget used.
     def getProgress(self):
-        return self.compute_progress
+        return self.search.getProgress()
+
+    #statistics of the search - nodes, time spent in each part of it, ..., see SearchStats. Final once the thread finished.
+    def getStats(self):
+        return self.search.getStats()
 
 
 #AI player
 class AIPlayer(Player):
     compute_thread = None
-    #difficulty - amount of moves predicted in advance
-    def __init__(self, color, difficulty, game = None):
+    #Pondering - while the opponent is thinking, replies to all of his moves are searched one by one.
+    #Searches by hash of the position after the opponent's move, finished or running. When the opponent plays, the search for his move is used.
+    ponder_threads = {}
+    #(position hash, game state) after opponent's moves that weren't searched yet
+    ponder_queue = []
+    #hash of the position the opponent is thinking about, pondering starts again when it changes
+    ponder_key = None
+    #key of the transposition table kept between the moves of this player, including pondered ones, see getPersistentTable.
+    #AI players with the same settings share it - when two of them play, the opponent's search already went through the position one move deeper than the player's own previous one.
+    #Players with different settings don't, a weaker player would otherwise play moves found by the stronger one.
+    table_key = None
+    #difficulty - amount of moves predicted in advance, search mode - one of SEARCH_MODE_*** from ai_search.py
+    #time budget - if set, seconds to think about every move. The search then goes as deep as it can in that time, difficulty is only the max depth.
+    def __init__(self, color, difficulty, game = None, search_mode = SEARCH_MODE_ALPHA_BETA, time_budget = None):
         super().__init__(color, game)
         self.difficulty = difficulty
+        self.search_mode = search_mode
+        self.time_budget = time_budget
+        self.ponder_threads = {}
+        self.ponder_queue = []
+        self.ponder_key = None
+        self.table_key = (difficulty, search_mode, time_budget)
+
+    #start searching the move for given game state - in the AI process or in a thread, both have the same interface
+    def startSearch(self, game_state):
+        backend = AIPlayerProcess if g_ai_process else AIPlayerThread
+        return backend(self.color, game_state, self.difficulty, self.search_mode, self.time_budget, g_search_stats_log, self.table_key)
+
+    #while the opponent is thinking, search replies to his moves one at a time
+    def ponder(self):
+        opponent = invertColor(self.color)
+        if not g_ai_ponder or not self.game.getPlayer(opponent).is_human or not self.game.isTurnOf(opponent): return
+        game_state = self.game.getGameState()
+        key = game_state.getHash(opponent)
+        if key != self.ponder_key:
+            self.stopPondering()
+            self.ponder_key = key
+            for move in listAllMoves(game_state, opponent):
+                if move == MOVE_PASS: continue
+                state_after = game_state.copy()
+                state_after.applyMove(move)
+                self.ponder_queue.append((state_after.getHash(self.color), state_after))
+        #one search at a time, so that the most likely replies aren't slowed down by the others
+        if self.ponder_queue and not any(thread.isAlive() for thread in self.ponder_threads.values()):
+            key_after, state_after = self.ponder_queue.pop(0)
+            if key_after not in self.ponder_threads:
+                self.ponder_threads[key_after] = self.startSearch(state_after)
+
+    #stop pondering, return the search for given position hash if there is one - the pondered search continues, or is finished already
+    def stopPondering(self, key = None):
+        thread = self.ponder_threads.pop(key, None)
+        for other in self.ponder_threads.values():
+            other.cancel()
+        self.ponder_threads = {}
+        self.ponder_queue = []
+        self.ponder_key = None
+        #a search cancelled together with another one has no result
+        if thread is not None and not thread.isAlive() and thread.getResult() is None: return None
+        return thread
 
     def draw(self, surf, time):
         #if AI should play
         if self.shouldPlay():
-            #if there isn't a compute thread for this move yet, create one
+            #if there isn't a compute thread for this move yet, continue the pondered one, or start a new one
             if self.compute_thread == None:
-                self.compute_thread = AIPlayerThread(self.color, self.game.getGameState().copy(), self.difficulty)
+                self.compute_thread = self.stopPondering(self.game.getGameState().getHash(self.color))
+                if self.compute_thread is None:
+                    self.compute_thread = self.startSearch(self.game.getGameState().copy())
+            #frames drawn while the AI computes are tagged in the profiler
+            profiler.tag("ai computing")
             #draw progress bar for the computation
             #select y value - progress bar is over the board for white or under for black
             y = 45 if self.color == COLOR_WHITE else 925
-            #draw gray background
-            pygame.draw.rect(surf, (128, 128, 128), (worldToScreenCoords((100, y)), (int(800*g_texture_scale), int(30*g_texture_scale))))
+            #draw gray background, the bar changes every frame
+            dirty_rects.mark(pygame.draw.rect(surf, (128, 128, 128), (worldToScreenCoords((100, y)), (int(800*g_texture_scale), int(30*g_texture_scale)))))
             #draw part progressed - white for white, dark gray for black
             pygame.draw.rect(surf, 
                 (255, 255, 255) if self.color == COLOR_WHITE else (64, 64, 64),\
@@ -253,6 +233,18 @@ class AIPlayer(Player):
             if not self.compute_thread.isAlive() and result:
                 self.game.playTurn(result)
                 self.compute_thread = None
+            #cancelled together with a different search - start again
+            elif not self.compute_thread.isAlive() and not result:
+                self.compute_thread = None
+        else:
+            self.ponder()
+
+    #stop computing the move, its' result would be for a game that doesn't exist anymore
+    def cancel(self):
+        if self.compute_thread is not None:
+            self.compute_thread.cancel()
+            self.compute_thread = None
+        self.stopPondering()
             
 
    
@@ -0,0 +1,165 @@
+import pygame
+from collections import deque
+from time import perf_counter
+import json
+import csv
+import math
+from global_defines import *
+from dirty_rects import dirty_rects
+
+
+#how many last frames are kept - percentiles in the overlay and exported traces are computed from them
+PROFILER_FRAME_COUNT = 600
+#percentiles shown in the overlay and exported to json
+PROFILER_PERCENTILES = (50, 90, 99)
+#key that shows/hides the overlay, and key that exports the trace
+PROFILER_OVERLAY_KEY = pygame.K_F3
+PROFILER_EXPORT_KEY = pygame.K_F4
+
+
+#Time spent in one part of a frame, used as a context manager - "with profiler.section('name'):".
+#A section can be entered multiple times during one frame, times are summed.
+class ProfilerSection:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.profiler.addTime(self.name, perf_counter() - self.start)
+        return False
+
+
+#Measures how long every frame and named parts of it take, keeps them for the last PROFILER_FRAME_COUNT frames.
+#Frames can be tagged, e.g. when an AI is computing, to see whether it slows the frames down.
+class FrameProfiler:
+    #(frame start, frame duration, {section : seconds}, set of tags) for the last frames
+    frames = None
+    #section times and tags of the frame being measured
+    current_sections = None
+    current_tags = None
+    #start of the frame being measured, None before the first frame
+    frame_start = None
+    #names of all sections ever measured, in the order they were first seen
+    section_names = []
+    #whether the overlay is drawn
+    overlay_visible = False
+    #font for the overlay, created when first needed
+    font = None
+    #screen area of the overlay drawn in the last frame
+    overlay_rect = None
+    def __init__(self, frame_count = PROFILER_FRAME_COUNT):
+        self.frames = deque(maxlen=frame_count)
+        self.current_sections = {}
+        self.current_tags = set()
+        self.frame_start = None
+        self.section_names = []
+        self.overlay_visible = False
+        self.font = None
+        self.overlay_rect = None
+
+    #return a context manager measuring a part of the frame with given name
+    def section(self, name):
+        return ProfilerSection(self, name)
+
+    def addTime(self, name, secs):
+        if name not in self.current_sections:
+            self.current_sections[name] = 0.0
+            if name not in self.section_names: self.section_names.append(name)
+        self.current_sections[name] += secs
+
+    #tag the current frame, e.g. "ai computing"
+    def tag(self, name):
+        self.current_tags.add(name)
+
+    #has to be called at the start of every frame - ends the previous frame. Frame duration is the time between two calls, including waiting for the next frame.
+    def startFrame(self):
+        now = perf_counter()
+        if self.frame_start is not None:
+            self.frames.append((self.frame_start, now - self.frame_start, self.current_sections, self.current_tags))
+        self.frame_start = now
+        self.current_sections = {}
+        self.current_tags = set()
+
+    #return given percentile of a list of values, by the nearest rank method
+    @staticmethod
+    def percentile(values, p):
+        if not values: return 0.0
+        values = sorted(values)
+        return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+    #return times of a section over the kept frames, "frame" for whole frames. Frames without the section count as 0.
+    def getTimes(self, name):
+        if name == "frame":
+            return [duration for start, duration, sections, tags in self.frames]
+        return [sections.get(name, 0.0) for start, duration, sections, tags in self.frames]
+
+    #return {name : {"p50" : secs, ...}} for whole frames and all sections
+    def getPercentiles(self):
+        result = {}
+        for name in ["frame"] + self.section_names:
+            times = self.getTimes(name)
+            result[name] = {"p%d" % p : self.percentile(times, p) for p in PROFILER_PERCENTILES}
+            result[name]["max"] = max(times, default=0.0)
+        return result
+
+    #react to profiler keys, returns whether the event was used
+    def handleEvent(self, event):
+        if event.type != pygame.KEYDOWN: return False
+        if event.key == PROFILER_OVERLAY_KEY:
+            self.overlay_visible = not self.overlay_visible
+            dirty_rects.markAll()
+            return True
+        if event.key == PROFILER_EXPORT_KEY:
+            self.exportTrace("profile")
+            return True
+        return False
+
+    #draw percentiles of all sections in the top left corner, in milliseconds
+    def drawOverlay(self, surf):
+        if not self.overlay_visible: return
+        if self.font is None:
+            self.font = pygame.font.Font(None, 20)
+        tagged = sum(1 for frame in self.frames if frame[3])
+        lines = ["%-12s %s" % ("ms", "  ".join("%6s" % ("p%d" % p) for p in PROFILER_PERCENTILES) + "     max")]
+        for name, values in self.getPercentiles().items():
+            lines.append("%-12s %s" % (name, "  ".join("%6.2f" % (values["p%d" % p] * 1000) for p in PROFILER_PERCENTILES) + "  %6.2f" % (values["max"] * 1000)))
+        lines.append("%d frames, %d tagged" % (len(self.frames), tagged))
+        renders = [self.font.render(line, True, (255, 255, 0)) for line in lines]
+        width = max(r.get_width() for r in renders) + 10
+        height = sum(r.get_height() for r in renders) + 10
+        self.overlay_rect = pygame.Rect(0, 0, width, height)
+        surf.fill((0, 0, 0), self.overlay_rect)
+        y = 5
+        for r in renders:
+            surf.blit(r, (5, y))
+            y += r.get_height()
+        #the overlay changes every frame
+        dirty_rects.mark(self.overlay_rect)
+
+    #write all kept frames to "<prefix>.csv", one row per frame, and percentiles to "<prefix>.json". Times are in seconds.
+    def exportTrace(self, prefix):
+        try:
+            with open(prefix + ".csv", "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["start", "frame"] + self.section_names + ["tags"])
+                for start, duration, sections, tags in self.frames:
+                    writer.writerow(["%.6f" % start, "%.6f" % duration] + ["%.6f" % sections.get(name, 0.0) for name in self.section_names] + [" ".join(sorted(tags))])
+            with open(prefix + ".json", "w") as f:
+                json.dump({"frames" : len(self.frames), "percentiles" : self.getPercentiles(),
+                    "tags" : {tag : sum(1 for frame in self.frames if tag in frame[3]) for tag in set().union(*[frame[3] for frame in self.frames])}}, f, indent=2)
+            print("Profile written to", prefix + ".csv", prefix + ".json")
+        except OSError as e:
+            print("Profile couldn't be written:", e)
+
+#profiler of the main loop, shared by all layouts and objects
+profiler = FrameProfiler()
+
+
+#if this file was ran instead of main.py, run main instead
+if __name__ == "__main__":
+    import main
@@ -5,17 +5,31 @@ class Texture:
     def get(self, time):
         print ("Get not implemented in derived class.")
 
+    #convert surfaces to the pixel format of the display, blitting them is much faster then. Can only be done once the display is created.
+    def finalize(self):
+        pass
+
 
 #Basic, 1-surface texture
 class BasicTexture(Texture):
     surface = None
+    #surface in the format it was loaded in, is kept after finalize() for use without a display
+    original_surface = None
     def __init__(self, surface):
         self.surface = surface
+        self.original_surface = surface
     def get(self, time):
         return self.surface
     #smoothscale the texture to the new size
     def rescale(self, new_width, new_height):
         self.surface = pygame.transform.smoothscale(self.surface, (new_width, new_height))
+        self.original_surface = self.surface
+    #surfaces without any transparent pixels don't need an alpha channel, they are converted without it
+    def finalize(self):
+        surf = self.original_surface
+        if surf is None: return
+        opaque = pygame.mask.from_surface(surf, 254).count() == surf.get_width() * surf.get_height()
+        self.surface = surf.convert() if opaque else surf.convert_alpha()
     #width in pixels
     def width(self):
         return self.surface.get_width()
@@ -57,6 +71,9 @@ class AnimatedTexture(Texture):
         i = int((time - self.start_t) // self.time_per_surface)
         return self.textures[min(i, len(self.textures)-1)].get(time)
 
+    def finalize(self):
+        for t in self.textures: t.finalize()
+
 
 
 #if this file was ran instead of main.py, run main instead
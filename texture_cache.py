@@ -0,0 +1,56 @@
+import pygame
+import hashlib
+import os
+
+
+#directory with cached textures, relative to the game directory same as textures
+TEXTURE_CACHE_DIR = ".texture_cache"
+#pixel format of cached textures
+TEXTURE_CACHE_FORMAT = "RGBA"
+
+
+#Cache of rescaled textures on disk. Decoding PNGs and smoothscaling them is slow, so the rescaled pixels are saved as raw RGBA data,
+#which can be read back with one file read. Files are named by hash of the source file, size and texture scale - when a PNG changes,
+#its' hash changes too and the texture is rescaled again, old files are just never used.
+class TextureCache:
+    directory = ""
+    def __init__(self, directory = TEXTURE_CACHE_DIR):
+        self.directory = directory
+
+    #name of the cache file for given source file rescaled to the given size
+    def cacheFilename(self, filename, w, h, scale):
+        with open(filename, "rb") as f:
+            digest = hashlib.sha1(f.read()).hexdigest()
+        return os.path.join(self.directory, "%s_%dx%d_%s.%s" % (digest, w, h, repr(scale), TEXTURE_CACHE_FORMAT.lower()))
+
+    #load surface from file rescaled to given size, from the cache if possible. Scale is only used as a part of the cache key.
+    def loadScaled(self, filename, w, h, scale):
+        cache_filename = self.cacheFilename(filename, w, h, scale)
+        try:
+            with open(cache_filename, "rb") as f:
+                data = f.read()
+            #a file of wrong size was probably not written completely, create it again
+            if len(data) == w * h * len(TEXTURE_CACHE_FORMAT):
+                return pygame.image.frombuffer(data, (w, h), TEXTURE_CACHE_FORMAT)
+        except FileNotFoundError:
+            pass
+        surface = pygame.transform.smoothscale(pygame.image.load(filename), (w, h))
+        self.save(cache_filename, surface)
+        return surface
+
+    #write surface pixels to the cache. The cache is only an optimization - if it cannot be written, textures are just loaded from the PNGs every time.
+    def save(self, cache_filename, surface):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            #write into a temporary file first, so that other processes never read a partially written one
+            tmp_filename = "%s.%d.tmp" % (cache_filename, os.getpid())
+            with open(tmp_filename, "wb") as f:
+                f.write(pygame.image.tobytes(surface, TEXTURE_CACHE_FORMAT))
+            os.replace(tmp_filename, cache_filename)
+        except OSError as e:
+            print ("Texture couldn't be cached:", cache_filename, e)
+
+
+#if this file was ran instead of main.py, run main instead
+if __name__ == "__main__":
+    import main
\ No newline at end of file
@@ -1,16 +1,33 @@
 import json
-from texture import AnimatedTexture, FileTexture
+import threading
+from texture import AnimatedTexture, BasicTexture, FileTexture
+from texture_cache import TextureCache, TEXTURE_CACHE_DIR
 from global_defines import *
 
 
-#Load all textures specified in textures.json, they can be requested globally based on name
+#Textures specified in textures.json, they can be requested globally based on name.
+#Textures are loaded when they are requested for the first time, the rest can be loaded by a background thread in the meantime (see startPrefetch).
 class TextureLoader:
     #texture directory
     directory = ""
-    #dictionary of all textures
+    #dictionary of all textures loaded already
     textures = {}
-    def __init__(self, tex_dir):
+    #(texture data, texture type data) from textures.json by texture name
+    texture_specs = {}
+    #guards textures - the prefetch thread and the game can both load textures at the same time
+    lock = None
+    #background thread loading textures before they are needed
+    prefetch_thread = None
+    #cache of rescaled textures, None if textures should always be loaded from the PNGs
+    cache = None
+    #whether textures are converted to the display format, see finalize()
+    finalized = False
+    def __init__(self, tex_dir, cache_dir = TEXTURE_CACHE_DIR):
         self.directory = tex_dir
+        self.cache = TextureCache(cache_dir) if cache_dir is not None else None
+        self.textures = {}
+        self.texture_specs = {}
+        self.lock = threading.RLock()
         #open texture list json
         with open(self.textureFilename("textures", "json")) as tex_list_file:
             tex_list = json.load(tex_list_file)
@@ -21,36 +38,67 @@ class TextureLoader:
             #load given texture type
             texture_types[tex_type["name"]] = tex_type
 
-        #go over all textures to load
+        #remember all textures, they are loaded when needed
         for tex_data in tex_list["textures"]:
-            #find out type of texture
-            tex_type = texture_types[tex_data["type"]]
-            #get texture name
-            name = tex_data["name"]
-            #compute tex width and height
-            w = int(tex_type["width"] * g_texture_scale)
-            h = int(tex_type["height"] * g_texture_scale)
-            if tex_type["animated"] == True:
-                fname = self.directory + "/" + name.replace(" ", "_") + "/frame"
-                frame_count = int(tex_data["frame_count"])
-                texs = [FileTexture(fname + str(frame).zfill(4) + ".png") for frame in range(frame_count)]
-                for t in texs: t.rescale(w, h)
-                self.textures[name] = AnimatedTexture(texs, 0.01)
-            else:
-                #load texture by name. Filename can be found by replacing every space in name with underscore
-                self.textures[name] = FileTexture(self.textureFilename(name.replace(" ", "_")))
-                #rescale texture to match size given by type and UI scale
-                self.textures[name].rescale(w, h)
+            self.texture_specs[tex_data["name"]] = (tex_data, texture_types[tex_data["type"]])
+
+    #load texture with the given name from its' file(s)
+    def load(self, name):
+        #find texture data and type of texture
+        tex_data, tex_type = self.texture_specs[name]
+        #compute tex width and height
+        w = int(tex_type["width"] * g_texture_scale)
+        h = int(tex_type["height"] * g_texture_scale)
+        if tex_type["animated"] == True:
+            fname = self.directory + "/" + name.replace(" ", "_") + "/frame"
+            frame_count = int(tex_data["frame_count"])
+            texs = [self.loadScaled(fname + str(frame).zfill(4) + ".png", w, h) for frame in range(frame_count)]
+            return AnimatedTexture(texs, 0.01)
+        #load texture by name. Filename can be found by replacing every space in name with underscore
+        return self.loadScaled(self.textureFilename(name.replace(" ", "_")), w, h)
+
+    #load texture from file, rescaled to match size given by type and UI scale
+    def loadScaled(self, filename, w, h):
+        if self.cache is None:
+            texture = FileTexture(filename)
+            texture.rescale(w, h)
+            return texture
+        return BasicTexture(self.cache.loadScaled(filename, w, h, g_texture_scale))
 
     #find out filename of texture. Is done by prepending directory name and appending extension name, png by default.
     def textureFilename(self, tex_name, ext = "png"):
         return self.directory + "/" + tex_name + "." + ext
 
-    #get a texture by name
+    #get a texture by name, load it if it wasn't loaded yet
     def get(self, name):
-        return self.textures[name]
+        with self.lock:
+            if name not in self.textures:
+                texture = self.load(name)
+                #textures loaded after finalize() are converted right away
+                if self.finalized: texture.finalize()
+                self.textures[name] = texture
+            return self.textures[name]
+
+    #convert all textures to the pixel format of the display, has to be called after the display is created.
+    #Without it, the textures stay in the format they were loaded in, e.g. when running without a display.
+    def finalize(self):
+        with self.lock:
+            self.finalized = True
+            for texture in self.textures.values():
+                texture.finalize()
+
+    #start loading all textures, which weren't requested yet, in a background thread
+    def startPrefetch(self):
+        if self.prefetch_thread is not None: return
+        self.prefetch_thread = threading.Thread(target=self.prefetch, daemon=True)
+        self.prefetch_thread.start()
+
+    def prefetch(self):
+        #textures are loaded one at a time, so that the game waits at most for one texture, when it needs one during prefetching
+        for name in list(self.texture_specs):
+            self.get(name)
 
-#load all textures
+#texture list, textures are loaded on demand
 textures = TextureLoader("textures")
 
 
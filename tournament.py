@@ -0,0 +1,184 @@
+from engine_defines import *
+from game_state import DefaultGameState
+from ai_search import GameSearch, SEARCH_MODE_MINIMAX, SEARCH_MODE_ALPHA_BETA
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from time import perf_counter
+import argparse
+import random
+import json
+import csv
+import os
+import sys
+
+
+#Headless AI vs AI matches - games are played without drawing or animations, distributed over a pool of processes.
+#Used to measure strength and speed of AI changes over many games.
+
+#search modes by name, the parallel mode isn't available - games are already played in parallel
+ENGINE_SEARCH_MODES = {"minimax" : SEARCH_MODE_MINIMAX, "alphabeta" : SEARCH_MODE_ALPHA_BETA}
+
+#games longer than this many moves (of both players together) are a draw, AI players can move their queens around forever
+DEFAULT_MOVE_LIMIT = 200
+
+
+#Settings of one AI player
+class EngineSettings:
+    def __init__(self, name, search_mode, depth, time_budget = None):
+        self.name = name
+        self.search_mode = search_mode
+        self.depth = depth
+        self.time_budget = time_budget
+
+    #parse settings from a string "[name=]mode:depth[:time budget]", e.g. "alphabeta:6" or "fast=alphabeta:12:0.1"
+    @staticmethod
+    def parse(text):
+        name, sep, spec = text.rpartition("=")
+        parts = spec.split(":")
+        if len(parts) not in (2, 3) or parts[0] not in ENGINE_SEARCH_MODES:
+            raise argparse.ArgumentTypeError("Invalid engine '%s', expected [name=]mode:depth[:time budget], mode is one of %s." % (text, ", ".join(ENGINE_SEARCH_MODES)))
+        time_budget = float(parts[2]) if len(parts) == 3 else None
+        return EngineSettings(name or spec, ENGINE_SEARCH_MODES[parts[0]], int(parts[1]), time_budget)
+
+    def createSearch(self):
+        return GameSearch(self.search_mode)
+
+    def findMove(self, search, color, game_state):
+        return search.findOptimalMove(color, game_state, self.depth, self.time_budget)
+
+
+#Play one game, runs in a worker process. Returns the game status and a list of (color, seconds, depth reached, nodes searched) for every move.
+#Rules are the same as in GameManager - a player without moves skips his turn. If neither player can move, or the move limit is reached, the game is a draw.
+def playGame(white, black, seed, move_limit):
+    random.seed(seed)
+    game_state = DefaultGameState()
+    engines = {COLOR_WHITE : white, COLOR_BLACK : black}
+    #every player has his own search, so that transposition tables aren't shared between them
+    searches = {color : engine.createSearch() for color, engine in engines.items()}
+    color = COLOR_WHITE
+    moves = []
+    skipped = 0
+    while len(moves) < move_limit:
+        status = game_state.checkGameStatus()
+        if status != GAME_STATE_UNDECIDED: return status, moves
+        must_jump, possible_moves = game_state.findPossibleMovesForPlayerOfColor(color)
+        if possible_moves:
+            skipped = 0
+            start = perf_counter()
+            move = engines[color].findMove(searches[color], color, game_state)
+            stats = searches[color].getStats()
+            moves.append((color, perf_counter() - start, stats.depth_reached, stats.nodes))
+            game_state.apply(move)
+        else:
+            skipped += 1
+            if skipped == 2: return GAME_STATE_DRAW, moves
+        color = invertColor(color)
+    return GAME_STATE_DRAW, moves
+
+
+#Results of all games of one engine
+class EngineStats:
+    def __init__(self, name):
+        self.name = name
+        self.wins = 0
+        self.draws = 0
+        self.losses = 0
+        self.move_count = 0
+        self.move_time = 0.0
+        self.max_move_time = 0.0
+
+    def addGame(self, status, color, moves):
+        if status == GAME_STATE_DRAW: self.draws += 1
+        elif status == (GAME_STATE_WHITE_WON if color == COLOR_WHITE else GAME_STATE_BLACK_WON): self.wins += 1
+        else: self.losses += 1
+        for move_color, secs, depth, nodes in moves:
+            if move_color != color: continue
+            self.move_count += 1
+            self.move_time += secs
+            self.max_move_time = max(self.max_move_time, secs)
+
+    #score - a win is one point, a draw half a point
+    def getScore(self):
+        games = self.wins + self.draws + self.losses
+        return (self.wins + 0.5 * self.draws) / games if games else 0.0
+
+    def toDict(self):
+        return {"wins" : self.wins, "draws" : self.draws, "losses" : self.losses, "score" : self.getScore(), "moves" : self.move_count,
+            "mean_move_time" : self.move_time / self.move_count if self.move_count else 0.0, "max_move_time" : self.max_move_time}
+
+
+#Play given amount of games between two engines, they swap colors every game. Calls on_game(game index, status) when a game finishes.
+#Returns a list of (game index, white engine, black engine, status, moves) sorted by game index.
+def runTournament(engine_a, engine_b, game_count, process_count, seed, move_limit, on_game = None):
+    games = []
+    with ProcessPoolExecutor(max_workers = process_count) as pool:
+        futures = {}
+        for game_i in range(game_count):
+            white, black = (engine_a, engine_b) if game_i % 2 == 0 else (engine_b, engine_a)
+            futures[pool.submit(playGame, white, black, seed + game_i, move_limit)] = (game_i, white, black)
+        for future in as_completed(futures):
+            game_i, white, black = futures[future]
+            status, moves = future.result()
+            games.append((game_i, white, black, status, moves))
+            if on_game: on_game(game_i, status)
+    games.sort(key = lambda g: g[0])
+    return games
+
+#statistics of both engines, keyed by engine name
+def computeStats(engine_a, engine_b, games):
+    stats = {engine_a.name : EngineStats(engine_a.name), engine_b.name : EngineStats(engine_b.name)}
+    for game_i, white, black, status, moves in games:
+        stats[white.name].addGame(status, COLOR_WHITE, moves)
+        stats[black.name].addGame(status, COLOR_BLACK, moves)
+    return stats
+
+#write timings of all moves as csv - one row per move
+def writeMoveTimings(path, games):
+    with open(path, "w", newline = "") as f:
+        writer = csv.writer(f)
+        writer.writerow(["game", "move", "engine", "color", "seconds", "depth", "nodes"])
+        for game_i, white, black, status, moves in games:
+            for move_i, (color, secs, depth, nodes) in enumerate(moves):
+                engine = white if color == COLOR_WHITE else black
+                writer.writerow([game_i, move_i, engine.name, "white" if color == COLOR_WHITE else "black", "%.6f" % secs, depth, nodes])
+
+
+def main(args):
+    parser = argparse.ArgumentParser(description = "Play AI vs AI games without a window and report results.")
+    parser.add_argument("engine_a", type = EngineSettings.parse, help = "[name=]mode:depth[:time budget], mode is one of %s" % ", ".join(ENGINE_SEARCH_MODES))
+    parser.add_argument("engine_b", type = EngineSettings.parse, help = "second engine, same format")
+    parser.add_argument("-n", "--games", type = int, default = 100, help = "amount of games, engines swap colors after every game")
+    parser.add_argument("-j", "--processes", type = int, default = os.cpu_count() or 1, help = "amount of worker processes")
+    parser.add_argument("--seed", type = int, default = 0, help = "seed of the first game, game i uses seed + i")
+    parser.add_argument("--move-limit", type = int, default = DEFAULT_MOVE_LIMIT, help = "games with more moves than this are a draw")
+    parser.add_argument("--output", help = "write statistics to this json file")
+    parser.add_argument("--timings", help = "write time of every move to this csv file")
+    args = parser.parse_args(args)
+    if args.engine_a.name == args.engine_b.name:
+        args.engine_b.name += "#2"
+
+    start = perf_counter()
+    done = []
+    def onGame(game_i, status):
+        done.append(status)
+        print("\r%d/%d games" % (len(done), args.games), end = "", flush = True)
+    games = runTournament(args.engine_a, args.engine_b, args.games, args.processes, args.seed, args.move_limit, onGame)
+    secs = perf_counter() - start
+    print()
+
+    stats = computeStats(args.engine_a, args.engine_b, games)
+    for s in stats.values():
+        d = s.toDict()
+        print("%-20s W %4d  D %4d  L %4d  score %.3f  mean move %.4f s  max move %.4f s" % (s.name, d["wins"], d["draws"], d["losses"], d["score"], d["mean_move_time"], d["max_move_time"]))
+    print("%d games in %.1f s, %.2f games/s" % (len(games), secs, len(games) / secs))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"games" : len(games), "seconds" : secs, "move_limit" : args.move_limit, "seed" : args.seed,
+                "engines" : {name : s.toDict() for name, s in stats.items()}}, f, indent = 2)
+    if args.timings:
+        writeMoveTimings(args.timings, games)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,96 @@
+#Transposition table - remembers results of already searched positions, so that positions reached by different move orders are searched only once.
+#AI players keep their table between moves (see getPersistentTable), the previous searches already went through most of the positions the next one reaches.
+
+from collections import OrderedDict
+
+#what the stored value means - exact value, or only a bound (the real value is at least/at most the stored one)
+BOUND_EXACT = 0
+BOUND_LOWER = 1
+BOUND_UPPER = 2
+
+
+#One stored position
+class TranspositionEntry:
+    __slots__ = ("key", "depth", "bound", "value", "best_move", "generation", "pieces")
+    def __init__(self, key, depth, bound, value, best_move, generation, pieces):
+        #full position hash, used to detect two positions sharing a slot
+        self.key = key
+        #how many moves deep was the position searched
+        self.depth = depth
+        self.bound = bound
+        self.value = value
+        #best move found in the position, can be None
+        self.best_move = best_move
+        #search this entry comes from, older entries are replaced first
+        self.generation = generation
+        #count of pieces on the board in the position - pieces are never added, so positions with more pieces than the current one can't be reached anymore
+        self.pieces = pieces
+
+
+#Fixed size table, position hash selects the slot. When two positions want the same slot, the deeper search or the more recent one is kept.
+class TranspositionTable:
+    def __init__(self, size_bits = 18):
+        self.size = 1 << size_bits
+        self.mask = self.size - 1
+        self.entries = [None] * self.size
+        self.generation = 0
+        #statistics - how many lookups were done and how many of them found the position
+        self.probes = 0
+        self.hits = 0
+        #most pieces of any stored position, nothing has to be evicted while the game has at least as many
+        self.max_pieces = 0
+
+    #has to be called before each new search - entries from previous searches become preferred for replacement
+    def newSearch(self):
+        self.generation += 1
+
+    #find entry for a given position hash, None if the position isn't stored
+    def probe(self, key):
+        self.probes += 1
+        entry = self.entries[key & self.mask]
+        if entry is not None and entry.key == key:
+            self.hits += 1
+            return entry
+        return None
+
+    #store a search result. Replaces the entry in the slot if it is for the same position, is from an older search or was searched less deep.
+    def store(self, key, depth, bound, value, best_move, pieces):
+        i = key & self.mask
+        entry = self.entries[i]
+        if entry is None or entry.key == key or entry.generation != self.generation or entry.depth <= depth:
+            self.entries[i] = TranspositionEntry(key, depth, bound, value, best_move, self.generation, pieces)
+            if pieces > self.max_pieces: self.max_pieces = pieces
+
+    #remove entries of positions with more than given count of pieces - when the game has that many pieces, they can't occur in it anymore.
+    #Positions that can still be reached are kept for the next searches.
+    def evictUnreachable(self, pieces):
+        if self.max_pieces <= pieces: return
+        self.entries = [entry if entry is None or entry.pieces <= pieces else None for entry in self.entries]
+        self.max_pieces = pieces
+
+    #remove all entries
+    def clear(self):
+        self.entries = [None] * self.size
+        self.max_pieces = 0
+
+
+#Tables kept between searches, by key. AI players search with a table kept between their moves, so the positions searched for the previous moves are reused.
+#Only the last few used tables are kept, there are at most two AI players at a time.
+PERSISTENT_TABLE_COUNT = 2
+persistent_tables = OrderedDict()
+
+#return the table for given key, a new one if the key wasn't used yet
+def getPersistentTable(key):
+    if key in persistent_tables:
+        persistent_tables.move_to_end(key)
+    else:
+        persistent_tables[key] = TranspositionTable()
+        #forget the least recently used table
+        if len(persistent_tables) > PERSISTENT_TABLE_COUNT:
+            persistent_tables.popitem(last=False)
+    return persistent_tables[key]
+
+
+#if this file was ran instead of main.py, run main instead
+if __name__ == "__main__":
+    import main
@@ -0,0 +1,27 @@
+from random import Random
+from bitboard import BOARD_BITS
+
+
+#Zobrist hashing - every (piece kind, square) pair gets a random 64-bit key, hash of a position is the xor of keys of all pieces on it.
+#Moving a piece then only changes the hash by two xors. Keys are generated from a fixed seed, so that all processes agree on them.
+ZOBRIST_SEED = 0x5EED
+
+#piece kinds, used as the first index into ZOBRIST_PIECE_KEYS
+ZOBRIST_WHITE_NORMAL = 0
+ZOBRIST_WHITE_QUEEN = 1
+ZOBRIST_BLACK_NORMAL = 2
+ZOBRIST_BLACK_QUEEN = 3
+
+def createZobristKeys():
+    rng = Random(ZOBRIST_SEED)
+    piece_keys = [[rng.getrandbits(64) for b in range(BOARD_BITS)] for kind in range(4)]
+    #key xored into the hash when black is the player to move
+    side_key = rng.getrandbits(64)
+    return piece_keys, side_key
+
+ZOBRIST_PIECE_KEYS, ZOBRIST_BLACK_TO_MOVE = createZobristKeys()
+
+
+#if this file was ran instead of main.py, run main instead
+if __name__ == "__main__":
+    import main